@@ -0,0 +1,124 @@
+"""
+品名正規化 / 去重基準測試 (SQLite 替身)
+
+以 Batch_Import_Declarations.csv 的貨物名稱為樣本產生 N 筆產品：
+  - 舊版: 逐筆比對 products.name_en 的原始品名 (含分隔線、貨櫃號碼)
+  - 新版: 正規化後的完整品名只存於 product_descriptions (每種品名一列)，products 只記 description_id
+比較兩者的品名儲存量，以及 search.py 形式的品名搜尋耗時。
+SQLite 沒有 FULLTEXT 索引，新版以 LIKE 掃描品名表，只反映去重的效果；
+MySQL 上品名表另有 ngram FULLTEXT 索引 (description.name_search_condition)，不需掃描整個品名表。
+
+用法:
+    python benchmarks/bench_description_search.py
+    python benchmarks/bench_description_search.py --products 200000 --repeat 20
+"""
+import argparse
+import csv
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import description  # noqa: E402
+
+LEGACY_SQL = "SELECT COUNT(*) FROM products_legacy WHERE name_en LIKE ?"
+NORMALIZED_SQL = """
+    SELECT COUNT(*) FROM products
+    WHERE description_id IN (
+        SELECT description_id FROM product_descriptions WHERE description LIKE ?
+    )
+"""
+KEYWORDS = ["收納籃", "Polyester", "Desk Mat", "STORAGE BOX", "寵物"]
+
+
+def _sample_names(csv_path):
+    with open(csv_path, encoding="utf-8-sig", newline="") as f:
+        names = [r["貨物名稱"] for r in csv.DictReader(f) if r.get("貨物名稱")]
+    if not names:
+        raise SystemExit(f"❌ {csv_path} 沒有貨物名稱")
+    return names
+
+
+def build(db_path, raw_names, n_products, rng):
+    raw = sqlite3.connect(db_path)
+    raw.executescript("""
+        CREATE TABLE products_legacy (product_id INTEGER PRIMARY KEY, name_en TEXT);
+        CREATE TABLE product_descriptions (
+            description_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            desc_hash BLOB NOT NULL UNIQUE, description TEXT
+        );
+        CREATE TABLE products (product_id INTEGER PRIMARY KEY, description_id INTEGER);
+        CREATE INDEX idx_products_description ON products (description_id);
+    """)
+    ids = {}
+    legacy_rows, rows = [], []
+    for pid in range(1, n_products + 1):
+        # 同款不同色 / 尺寸：在原始品名加上變體編號，約 20 個產品共用一種品名
+        base = rng.choice(raw_names)
+        variant = rng.randrange(max(1, n_products // 20 // len(raw_names)) + 1)
+        raw_name = base.replace(" ", f" -{variant}- ", 1)
+        legacy_rows.append((pid, raw_name))
+
+        text = description.normalize_description(raw_name)
+        digest = description.description_hash(text)
+        if digest not in ids:
+            ids[digest] = len(ids) + 1
+            raw.execute("INSERT INTO product_descriptions (description_id, desc_hash, description) "
+                        "VALUES (?, ?, ?)", (ids[digest], digest, text))
+        rows.append((pid, ids[digest]))
+    raw.executemany("INSERT INTO products_legacy VALUES (?, ?)", legacy_rows)
+    raw.executemany("INSERT INTO products VALUES (?, ?)", rows)
+    raw.commit()
+
+    legacy_bytes = raw.execute("SELECT SUM(LENGTH(CAST(name_en AS BLOB))) FROM products_legacy").fetchone()[0]
+    new_bytes = raw.execute("SELECT SUM(LENGTH(CAST(description AS BLOB)) + 20) "
+                            "FROM product_descriptions").fetchone()[0]
+    # products.description_id 每列約 4 bytes
+    return raw, legacy_bytes, new_bytes + 4 * n_products, len(ids)
+
+
+def _time(raw, sql, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        raw.execute(sql, params).fetchone()
+        samples.append((time.perf_counter() - t) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--csv", default=os.path.join(ROOT_DIR, "Batch_Import_Declarations.csv"))
+    ap.add_argument("--products", type=int, default=100000)
+    ap.add_argument("--repeat", type=int, default=10)
+    args = ap.parse_args()
+
+    rng = random.Random(3)
+    raw_names = _sample_names(args.csv)
+    with tempfile.TemporaryDirectory() as tmp:
+        raw, legacy_bytes, new_bytes, distinct = build(os.path.join(tmp, "desc.sqlite"), raw_names,
+                                                       args.products, rng)
+        print(f"產品 {args.products:,} 筆 -> 不重複品名 {distinct:,} 種")
+        print(f"品名儲存 / 掃描量: products.name_en {legacy_bytes / 1024:,.0f} KB  "
+              f"品名表 + description_id {new_bytes / 1024:,.0f} KB ({new_bytes / legacy_bytes:.0%})")
+        print("-" * 60)
+        print(f"{'關鍵字':<14}{'舊版 ms':>10}{'新版 ms':>10}{'加速':>8}{'筆數':>10}")
+        for kw in KEYWORDS:
+            param = f"%{kw}%"
+            old_ms = _time(raw, LEGACY_SQL, (param,), args.repeat)
+            new_ms = _time(raw, NORMALIZED_SQL, (param,), args.repeat)
+            old_n = raw.execute(LEGACY_SQL, (param,)).fetchone()[0]
+            new_n = raw.execute(NORMALIZED_SQL, (param,)).fetchone()[0]
+            note = "" if old_n == new_n else f" (舊版 {old_n:,})"
+            print(f"{kw:<14}{old_ms:>10.2f}{new_ms:>10.2f}{old_ms / new_ms:>7.1f}x{new_n:>10,}{note}")
+        raw.close()
+
+
+if __name__ == "__main__":
+    main()
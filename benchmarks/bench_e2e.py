@@ -0,0 +1,349 @@
+"""
+端到端壓測：產生資料 -> PDF 解析 -> CSV 匯入 -> 查詢
+
+以 gen_dataset.py 產生指定規模的合成報單，依序量測：
+  1. parse : parser.parse_single_pdf 解析合成 PDF (每檔延遲、頁/秒、項次/秒)，並與預期結果比對正確率
+  2. import: import_tool.import_csv_to_db 匯入解析結果與各分檔 CSV (每檔延遲、列/秒、
+             各 SQL 語句延遲百分位數，取自匯入的 metrics JSON)；--reimport 另量測重匯未變更資料
+  3. search: search.search_items (條碼 / 品名 / 稅則 / 報單號碼 / 首頁) 與 lookup_barcodes 批次查詢
+每階段輸出吞吐量與 p50 / p95 / p99 / max 延遲 (--output 另存 JSON 報告)。
+
+資料庫預設為 SQLite 替身 (sqlite_standin.py)。加上 --mysql 改用 .env 設定的 MySQL：
+會寫入大量合成報單，請務必指向測試用的資料庫。
+
+所有中間檔 (CSV、PDF、layout_cache.json、檢查報告、匯入 metrics) 都寫在工作目錄
+(預設為暫存目錄，結束後刪除；--keep 保留)。
+
+用法:
+    python benchmarks/bench_e2e.py
+    python benchmarks/bench_e2e.py --items 1000000 --rows-per-file 100000 --pdf-decls 50 --queries 2000
+    python benchmarks/bench_e2e.py --variant corrected --reimport --output e2e.json
+    python benchmarks/bench_e2e.py --mysql --items 100000
+"""
+import argparse
+import contextlib
+import csv
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import gen_dataset  # noqa: E402
+
+LOOKUP_BATCH = 20
+SEARCH_KINDS = ["barcode", "name", "ccc", "decl_no", "init", "lookup"]
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return sorted_values[idx]
+
+
+def _stage(name, latencies_ms, elapsed, units, unit_name):
+    latencies_ms = sorted(latencies_ms)
+    return {
+        "stage": name,
+        "ops": len(latencies_ms),
+        "elapsed_sec": round(elapsed, 3),
+        "units": units,
+        "unit": unit_name,
+        "throughput": round(units / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(_percentile(latencies_ms, 0.50), 3),
+        "p95_ms": round(_percentile(latencies_ms, 0.95), 3),
+        "p99_ms": round(_percentile(latencies_ms, 0.99), 3),
+        "max_ms": round(latencies_ms[-1], 3) if latencies_ms else 0.0,
+    }
+
+# ==========================================
+# 1. PDF 解析
+# ==========================================
+
+def run_parse(manifest, out_csv):
+    import parser
+
+    truth = {}
+    if manifest["truth"]:
+        with open(manifest["truth"], encoding="utf-8-sig", newline="") as f:
+            truth = {(r['報單號碼'], r['項次']): r for r in csv.DictReader(f)}
+
+    latencies, rows = [], []
+    t0 = time.perf_counter()
+    for pdf in manifest["pdf"]:
+        t = time.perf_counter()
+        rows.extend(parser.parse_single_pdf(pdf["path"]))
+        latencies.append((time.perf_counter() - t) * 1000)
+    elapsed = time.perf_counter() - t0
+
+    columns = gen_dataset.CSV_VARIANTS["batch"][0]
+    with open(out_csv, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+    # 正確率：每個欄位都與預期相同才算正確
+    parsed = {(r['報單號碼'], str(r['項次'])): r for r in rows}
+    field_errors = {}
+    correct = 0
+    for key, expected in truth.items():
+        got = parsed.get(key)
+        wrong = [col for col in columns if got is None or str(got.get(col, "")) != expected[col]]
+        for col in wrong:
+            field_errors[col] = field_errors.get(col, 0) + 1
+        correct += not wrong
+
+    pages = sum(p["pages"] for p in manifest["pdf"])
+    result = _stage("parse", latencies, elapsed, len(rows), "items")
+    result.update({
+        "files": len(manifest["pdf"]),
+        "pages": pages,
+        "pages_per_sec": round(pages / elapsed, 1) if elapsed > 0 else 0.0,
+        "expected_items": len(truth),
+        "correct_items": correct,
+        "accuracy": round(correct / len(truth), 4) if truth else None,
+        "extra_items": len(set(parsed) - set(truth)),
+        "field_errors": field_errors,
+    })
+    return result
+
+# ==========================================
+# 2. 匯入
+# ==========================================
+
+def _merge_statements(merged, statements):
+    for name, h in statements.items():
+        m = merged.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "buckets": {}})
+        m["count"] += h["count"]
+        m["total_ms"] += h["total_ms"]
+        m["max_ms"] = max(m["max_ms"], h["max_ms"])
+        for le, c in h["buckets"].items():
+            m["buckets"][le] = m["buckets"].get(le, 0) + c
+
+
+def _bucket_percentile(m, q):
+    """ 與 metrics._Histogram.percentile 相同：回傳所在分桶的上限 """
+    target = q * m["count"]
+    running = 0
+    for le, c in m["buckets"].items():
+        running += c
+        if running >= target:
+            return m["max_ms"] if le == "le_inf" else float(le[3:])
+    return m["max_ms"]
+
+
+def run_import(name, csv_paths, workdir, log):
+    import import_tool
+
+    latencies, statements = [], {}
+    total_rows = 0
+    written_rows = 0
+    round_trips = 0
+    t0 = time.perf_counter()
+    for i, path in enumerate(csv_paths, start=1):
+        metrics_json = os.path.join(workdir, f"{name}_metrics_{i:04d}.json")
+        t = time.perf_counter()
+        with contextlib.redirect_stdout(log):
+            count, _ = import_tool.import_csv_to_db(path, metrics_json=metrics_json, metrics_prom=None)
+        latencies.append((time.perf_counter() - t) * 1000)
+        if not os.path.exists(metrics_json):
+            raise RuntimeError(f"匯入失敗: {path} (詳見 {log.name})")
+        with open(metrics_json, encoding="utf-8") as f:
+            m = json.load(f)
+        # metrics 的 rows 不含內容未變而略過的列，吞吐量以 CSV 列數計
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            total_rows += sum(1 for _ in csv.DictReader(f))
+        written_rows += m["rows"]
+        round_trips += m["round_trips"]
+        _merge_statements(statements, m["statements"])
+        print(f"   {name}: {i}/{len(csv_paths)} 檔，{total_rows:,} 列 "
+              f"({total_rows / (time.perf_counter() - t0):,.0f} 列/秒)", end="\r")
+    elapsed = time.perf_counter() - t0
+    print()
+
+    result = _stage(name, latencies, elapsed, total_rows, "rows")
+    result["files"] = len(csv_paths)
+    result["written_rows"] = written_rows
+    result["round_trips_per_row"] = round(round_trips / total_rows, 2) if total_rows else 0.0
+    result["statements"] = {
+        stmt: {
+            "count": m["count"],
+            "avg_ms": round(m["total_ms"] / m["count"], 3) if m["count"] else 0.0,
+            "p50_ms": _bucket_percentile(m, 0.50),
+            "p95_ms": _bucket_percentile(m, 0.95),
+            "p99_ms": _bucket_percentile(m, 0.99),
+            "max_ms": round(m["max_ms"], 3),
+        }
+        for stmt, m in sorted(statements.items())
+    }
+    return result
+
+# ==========================================
+# 3. 查詢
+# ==========================================
+
+def _query_samples(csv_path, rng, n):
+    with open(csv_path, encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.DictReader(f))
+    picks = [rng.choice(rows) for _ in range(n)]
+    words = sorted({w for r in rows for w in r['貨物名稱'].split() if len(w) >= 3 and not w.startswith("-")})
+    return {
+        "barcode": [r['貨號/條碼'] for r in picks],
+        "name": [rng.choice(words) for _ in range(n)],
+        "ccc": [r['稅則號列'][:7] for r in picks],
+        "decl_no": [r['報單號碼'] for r in picks],
+    }
+
+
+def run_search(conn, samples, n_queries, rng):
+    from search import search_items, lookup_barcodes
+
+    per_kind = max(1, n_queries // len(SEARCH_KINDS))
+    results = []
+    with conn.cursor() as cursor:
+        for kind in SEARCH_KINDS:
+            latencies = []
+            units = 0
+            t0 = time.perf_counter()
+            for i in range(per_kind):
+                t = time.perf_counter()
+                if kind == "init":
+                    found = search_items(cursor, init=True)
+                elif kind == "lookup":
+                    batch = [rng.choice(samples["barcode"]) for _ in range(LOOKUP_BATCH)]
+                    found = lookup_barcodes(cursor, batch)
+                else:
+                    found = search_items(cursor, samples[kind][i % len(samples[kind])])
+                latencies.append((time.perf_counter() - t) * 1000)
+                units += len(found)
+            elapsed = time.perf_counter() - t0
+            result = _stage(f"search:{kind}", latencies, elapsed, per_kind, "queries")
+            result["avg_rows"] = round(units / per_kind, 1)
+            results.append(result)
+    return results
+
+# ==========================================
+# 主流程
+# ==========================================
+
+def _print_table(stages):
+    print("-" * 100)
+    print(f"{'階段':<18}{'次數':>8}{'秒':>9}{'吞吐量':>18}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for s in stages:
+        rate = f"{s['throughput']:,.1f} {s['unit']}/s"
+        print(f"{s['stage']:<18}{s['ops']:>8,}{s['elapsed_sec']:>9.2f}{rate:>18}"
+              f"{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['max_ms']:>10.2f}")
+
+
+def _print_statements(stage):
+    print(f"\n{stage['stage']} SQL 語句延遲 (ms，分桶上限)")
+    for stmt, h in stage["statements"].items():
+        print(f"   {stmt:<28}{h['count']:>10,}  avg {h['avg_ms']:>8.3f}  p50 {h['p50_ms']:>7}  "
+              f"p95 {h['p95_ms']:>7}  p99 {h['p99_ms']:>7}  max {h['max_ms']:>9.3f}")
+
+
+def run(args):
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="bench_e2e_")
+    os.makedirs(workdir, exist_ok=True)
+    output = os.path.abspath(args.output) if args.output else None
+    # layout_cache.json、檢查報告等以相對路徑寫出，全部留在工作目錄
+    os.chdir(workdir)
+    rng = random.Random(args.seed)
+    print(f"📁 工作目錄: {workdir}")
+
+    import import_tool
+
+    if args.mysql:
+        from database import create_connection
+        backend = "mysql"
+    else:
+        import sqlite_standin
+
+        db_path = os.path.join(workdir, "e2e.sqlite")
+        sqlite_standin.create_schema(db_path)
+        create_connection = sqlite_standin.connection_factory(db_path)
+        import_tool.create_connection = create_connection
+        backend = f"sqlite ({db_path})"
+
+    report = {"backend": backend, "items": args.items, "variant": args.variant, "seed": args.seed, "stages": []}
+    stages = report["stages"]
+
+    print(f"🏭 產生 {args.items:,} 項次 ...")
+    t = time.perf_counter()
+    manifest = gen_dataset.generate(os.path.join(workdir, "data"), args.items, [args.variant],
+                                    args.rows_per_file, args.pdf_decls, args.seed)
+    gen_sec = time.perf_counter() - t
+    print()
+    report["generate"] = {"declarations": manifest["declarations"], "elapsed_sec": round(gen_sec, 3),
+                          "items_per_sec": round(manifest["items"] / gen_sec, 1)}
+
+    csv_paths = manifest["csv"][args.variant]
+    with open(os.path.join(workdir, "import.log"), "w", encoding="utf-8") as log:
+        if manifest["pdf"]:
+            print(f"📄 解析 {len(manifest['pdf'])} 個 PDF ...")
+            parsed_csv = os.path.join(workdir, "parsed.csv")
+            parse = run_parse(manifest, parsed_csv)
+            stages.append(parse)
+            print(f"   正確率 {parse['correct_items']:,} / {parse['expected_items']:,}"
+                  + (f"，錯誤欄位 {parse['field_errors']}" if parse["field_errors"] else ""))
+            # 解析結果與同批報單的 CSV 重複；先匯入解析結果，CSV 中的同張報單即走「未變更」路徑
+            stages.append(run_import("import:parsed", [parsed_csv], workdir, log))
+
+        print(f"📥 匯入 {len(csv_paths)} 個 CSV ({args.variant}) ...")
+        stages.append(run_import("import", csv_paths, workdir, log))
+        if args.reimport:
+            stages.append(run_import("import:unchanged", csv_paths[:1], workdir, log))
+
+    print(f"🔍 查詢 {args.queries:,} 次 ...")
+    samples = _query_samples(csv_paths[0], rng, max(1, args.queries))
+    conn = create_connection()
+    try:
+        stages.extend(run_search(conn, samples, args.queries, rng))
+    finally:
+        conn.close()
+
+    _print_table(stages)
+    for s in stages:
+        if s.get("statements"):
+            _print_statements(s)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 報告已儲存至: {output}")
+
+    os.chdir(ROOT_DIR)
+    if not args.keep and not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    parse = next((s for s in stages if s["stage"] == "parse"), None)
+    return 1 if parse and parse["accuracy"] is not None and parse["accuracy"] < 1 else 0
+
+
+def main():
+    sys.stdout.reconfigure(encoding="utf-8")
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--items", type=int, default=20000, help="合成項次總數")
+    ap.add_argument("--variant", default="batch", choices=gen_dataset.IMPORTABLE_VARIANTS,
+                    help="匯入的 CSV 表頭格式")
+    ap.add_argument("--rows-per-file", type=int, default=5000, help="每個 CSV 分檔的列數 (每檔匯入一次)")
+    ap.add_argument("--pdf-decls", type=int, default=10, help="產生並解析的 PDF 報單張數")
+    ap.add_argument("--queries", type=int, default=600, help="查詢總次數 (平均分配到各查詢類型)")
+    ap.add_argument("--reimport", action="store_true", help="重匯第一個 CSV，量測未變更資料的略過速度")
+    ap.add_argument("--seed", type=int, default=gen_dataset.DEFAULT_SEED)
+    ap.add_argument("--workdir", help="工作目錄 (預設為暫存目錄)")
+    ap.add_argument("--keep", action="store_true", help="保留暫存工作目錄")
+    ap.add_argument("--output", help="JSON 報告路徑")
+    ap.add_argument("--mysql", action="store_true", help="使用 .env 設定的 MySQL (請用測試資料庫)")
+    args = ap.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+解析器記憶體 / 配置量基準測試 (以 overpdf/ 範例檔量測)
+
+比較兩種單頁 word 表示法：
+  - 舊版: pdfplumber 原始 word dict (濾除表頭雜訊後整批保留)
+  - 新版: parser.compact_words() 產生的 __slots__ _Word 記錄
+
+並量測整份 parse_single_pdf 的尖峰記憶體、配置區塊數與耗時。
+
+用法:
+    python benchmarks/bench_parse_memory.py
+    python benchmarks/bench_parse_memory.py --dir overpdf --limit 5
+"""
+import argparse
+import gc
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import parser as pdf_parser  # noqa: E402
+
+
+def _measure(build):
+    """ 回傳 build() 結果保留下來的 (bytes, 配置區塊數) """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+    size = sum(s.size_diff for s in stats)
+    blocks = sum(s.count_diff for s in stats)
+    del result
+    return max(size, 0), max(blocks, 0)
+
+
+def bench_word_representation(pdf_files):
+    import pdfplumber
+
+    legacy_bytes = compact_bytes = 0
+    legacy_blocks = compact_blocks = 0
+    total_words = 0
+
+    for path in pdf_files:
+        with pdfplumber.open(path) as pdf:
+            for page in pdf.pages:
+                raw = page.extract_words(keep_blank_chars=True)
+                total_words += len(raw)
+
+                # 舊版流程會複製一份 dict (pdfplumber 每次 extract 都是新的 dict)
+                b, c = _measure(lambda: [dict(w) for w in raw if not pdf_parser.is_header_noise(w['text'])])
+                legacy_bytes += b
+                legacy_blocks += c
+
+                b, c = _measure(lambda: pdf_parser.compact_words(raw))
+                compact_bytes += b
+                compact_blocks += c
+                page.flush_cache()
+
+    print("📐 單頁 word 表示法 (保留於記憶體的量)")
+    print(f"   words 總數        : {total_words:,}")
+    print(f"   舊版 dict         : {legacy_bytes / 1024:10.1f} KiB / {legacy_blocks:,} blocks")
+    print(f"   新版 __slots__    : {compact_bytes / 1024:10.1f} KiB / {compact_blocks:,} blocks")
+    if legacy_bytes:
+        print(f"   減少              : {100 * (1 - compact_bytes / legacy_bytes):.1f}% bytes, "
+              f"{100 * (1 - compact_blocks / max(legacy_blocks, 1)):.1f}% blocks")
+
+
+def bench_full_parse(pdf_files):
+    print("\n⏱️ parse_single_pdf 全流程")
+    print(f"   {'檔名':<28} | {'項次':>4} | {'尖峰 (KiB)':>10} | {'耗時 (ms)':>9}")
+    for path in pdf_files:
+        gc.collect()
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        data = pdf_parser.parse_single_pdf(path)
+        elapsed = (time.perf_counter() - t0) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"   {os.path.basename(path):<28} | {len(data):>4} | {peak / 1024:>10.1f} | {elapsed:>9.1f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="量測解析器的記憶體與配置量")
+    ap.add_argument("--dir", default=os.path.join(ROOT_DIR, "overpdf"), help="PDF 範例目錄")
+    ap.add_argument("--limit", type=int, default=0, help="只量測前 N 個檔案 (0 = 全部)")
+    args = ap.parse_args()
+
+    pdf_files = sorted(glob.glob(os.path.join(args.dir, "*.pdf")))
+    if args.limit:
+        pdf_files = pdf_files[:args.limit]
+    if not pdf_files:
+        print(f"⚠️ 在 {args.dir} 中找不到任何 PDF 檔案。")
+        return
+
+    bench_word_representation(pdf_files)
+    bench_full_parse(pdf_files)
+
+
+if __name__ == "__main__":
+    main()
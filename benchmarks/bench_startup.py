@@ -0,0 +1,116 @@
+"""
+啟動時間預算檢查 (以 python -X importtime 量測)
+
+用法:
+    python benchmarks/bench_startup.py            # 量測並檢查預算
+    python benchmarks/bench_startup.py --runs 10  # 指定量測次數 (取中位數)
+
+任何模組超出預算、或載入了不該在啟動時載入的重量級套件，結束代碼為 1。
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 模組 -> 啟動預算 (毫秒，cumulative import time 中位數)
+STARTUP_BUDGET_MS = {
+    "main": 250,        # 大部分時間花在 customtkinter，本身不可再載入 DB 套件
+    "parser": 60,
+    "import_tool": 60,
+    "database": 40,
+}
+
+# 模組 -> 啟動時「不得」被載入的重量級套件
+FORBIDDEN_AT_IMPORT = {
+    "main": ["pymysql", "dotenv", "database", "pandas", "pdfplumber"],
+    "parser": ["pandas", "pdfplumber", "pdfminer"],
+    "import_tool": ["pymysql", "dotenv", "tkinter", "pandas"],
+    "database": ["pymysql", "dotenv"],
+}
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def measure_import(module):
+    """ 執行一次 -X importtime，回傳 (頂層模組 cumulative 微秒, 被載入的模組名稱集合) """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} 失敗:\n{proc.stderr.strip().splitlines()[-1]}")
+
+    total_us = None
+    loaded = set()
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        name = m.group(4)
+        loaded.add(name)
+        # 縮排為一個空白者即為頂層 import
+        if name == module and len(m.group(3)) <= 1:
+            total_us = int(m.group(2))
+
+    if total_us is None:
+        raise RuntimeError(f"importtime 輸出中找不到模組 {module}")
+    return total_us, loaded
+
+
+def run_benchmark(runs):
+    failed = False
+    print(f"{'模組':<14} | {'中位數 (ms)':>10} | {'預算 (ms)':>9} | 結果")
+    print("-" * 52)
+
+    for module, budget_ms in STARTUP_BUDGET_MS.items():
+        try:
+            # 第一次執行會寫入 .pyc，不列入統計
+            measure_import(module)
+            samples = []
+            loaded = set()
+            for _ in range(runs):
+                us, loaded = measure_import(module)
+                samples.append(us / 1000)
+        except RuntimeError as e:
+            print(f"{module:<14} | {'-':>10} | {budget_ms:>9} | ⚠️ {e}")
+            failed = True
+            continue
+
+        median_ms = statistics.median(samples)
+        leaked = [
+            pkg for pkg in FORBIDDEN_AT_IMPORT.get(module, [])
+            if any(name == pkg or name.startswith(pkg + ".") for name in loaded)
+        ]
+
+        status = "✅"
+        if median_ms > budget_ms:
+            status = "❌ 超出預算"
+            failed = True
+        if leaked:
+            status = f"❌ 啟動時載入了: {', '.join(leaked)}"
+            failed = True
+
+        print(f"{module:<14} | {median_ms:>10.1f} | {budget_ms:>9} | {status}")
+
+    return not failed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="檢查各進入點的 import 啟動時間預算")
+    ap.add_argument("--runs", type=int, default=5, help="每個模組量測次數 (預設 5)")
+    args = ap.parse_args()
+
+    ok = run_benchmark(args.runs)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
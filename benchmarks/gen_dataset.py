@@ -0,0 +1,504 @@
+"""
+合成報單資料產生器 (大量資料壓測用)
+
+依固定亂數種子產生貼近實際的進口報單明細 (1 萬 ~ 1000 萬項次)，輸出：
+  - CSV：本專案用過的各種表頭格式 (見 CSV_VARIANTS)，每檔約 --rows-per-file 列，
+    報單不跨檔 (與實際每批匯入的單位一致)
+  - PDF：前 --pdf-decls 張報單，版面與 parse_single_pdf 解析的報單相同
+    (欄位位置、跨頁表頭、項次分隔線、頁尾件數 / 貨櫃號碼)，
+    並附 truth.csv (parser.main 應輸出的內容) 供比對解析正確率
+
+資料特性：
+  - 產品目錄約為項次數的 1/8，同款多色 / 多尺寸；熱門商品在多張報單重複出現 (--skew 越大越集中)
+  - 每張報單 1 ~ 150 項；少量項次改申報其他稅則 (--drift)，匯入前檢查會出現歷史不一致警告
+  - --noise 比例的 CSV 品名夾帶舊版 parser 的版面殘留 (分隔線、"項 次"、貨櫃號碼、件數)
+
+PDF 不依賴任何 PDF 套件：以標準函式庫直接寫出 PDF，中文使用 Acrobat 內建的
+MSung-Light (Adobe-CNS1 / UniCNS-UCS2-H)，pdfplumber 可直接抽出文字。
+
+用法:
+    python benchmarks/gen_dataset.py --items 100000 --out /tmp/decl_data
+    python benchmarks/gen_dataset.py --items 10000000 --rows-per-file 200000 --variants batch --pdf-decls 0
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+import zlib
+from collections import namedtuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from description import normalize_description  # noqa: E402
+from parser import generate_sop  # noqa: E402
+from sqlite_standin import ean13  # noqa: E402
+
+DEFAULT_SEED = 20240712
+
+# ==========================================
+# 詞彙 (取自 Import_Data.csv / G2123_Corrected.csv 等實際資料)
+# ==========================================
+# (英文品名, 材質, 中文品名, 稅則號列, 許可證號碼)
+_TEMPLATES = [
+    ("Wire Basket", "Steel", "收納籃", "7323.99.00.00-8", "CI999999999999"),
+    ("PAPER BASKET", "Body：Paper Frame：Steel", "編織收納籃", "4602.90.00.00-5", ""),
+    ("STORAGE BOX", "Polyester Cardboard", "附蓋收納盒", "6307.90.90.90-1", "CI999999999999"),
+    ("Faux Bull Leather Reversible Desk Mat", "Polyvinyl chloride", "雙面桌墊", "3924.90.00.90-9", ""),
+    ("PET TOY", "Polyester Cotton", "貓用玩具", "6701.00.30.00-4", ""),
+    ("Balance Board", "Polypropylene", "平衡板", "9506.91.00.00-1", ""),
+    ("CI Shopping Bag", "Polyester", "購物袋", "4202.92.90.92-7", ""),
+    ("Bath Brush", "Beech wood Pig bristle", "沐浴刷", "9603.29.00.00-0", ""),
+    ("Stand Mirror", "Glass Steel", "立鏡", "7009.92.00.00-6", ""),
+    ("Foam Pump Bottle", "Polyethylene terephthalate", "泡沫按壓瓶", "8413.20.00.00-1", ""),
+    ("CI Transparent case", "Polystyrene", "小物收納盒", "3924.90.00.90-9", ""),
+    ("Hair Curler", "Polypropylene", "髮捲", "9615.90.00.00-0", ""),
+    ("KEY RINGS", "ABS resin, Iron, Aluminum alloy, Polyester", "伸縮式鑰匙吊環未附玩具",
+     "7326.90.90.90-6", "CI999999999999"),
+    ("nail clipper extra large", "Stainless steel", "指甲剪", "8214.20.00.00-2", ""),
+    ("handy mesh pouch W zipper type", "Polyester", "收納袋", "4202.32.00.10-8", ""),
+    ("CLEANING CLOTH", "90% Polyester 10% Nylon", "超細纖維抹布", "6307.10.00.00-6", ""),
+    ("CI Wire Flower", "Body：Steel Coating：Epoxy resin", "鐵製裝飾花", "8306.29.00.00-2", ""),
+    ("Solar Garden Light", "Polypropylene", "太陽能園藝燈", "9405.41.90.00-5", ""),
+    ("Headphones Foldable", "ABS resin", "頭戴式耳機(有線)", "8518.30.10.00-1", "CI999999999999"),
+    ("Trash Can", "Polypropylene", "垃圾桶", "3924.90.00.90-9", ""),
+    ("STEEL BOOKED IN", "Steel", "書擋", "7326.90.20.00-0", ""),
+    ("Towel Hanger For Door", "Iron (Powder coating)", "廚房抹布架", "8302.50.00.00-8", ""),
+    ("Low Resilience Lumbar Cushion", "Polyurethane foam", "低反發腰靠枕", "9404.90.00.19-4", ""),
+    ("Melamine Bowl", "Melamine resin", "美耐皿碗", "3924.10.00.00-4", "IFB20240000001"),
+    ("Wooden Toy Car", "Beech wood", "木製玩具車", "9503.00.90.00-2", "CI999999999999"),
+]
+_COLORS = ["White", "Black", "Gray", "Beige", "Navy", "Brown", "Clear", "Green", "Pink", "Blue"]
+_SIZES = ["", "S", "M", "L", "A5", "A4", "20L", "35×70cm", "Large", "Small"]
+# (生產國別, 累計比例 %)
+_ORIGINS = [("CHINA CN", 80), ("THAILAND TH", 88), ("VIETNAM VN", 95), ("JAPAN JP", 98), ("INDONESIA ID", 100)]
+_OFFICES = ["441", "442", "416"]
+_CONTAINER_OWNERS = ["DFS", "SNB", "TCN", "OOL"]
+
+Item = namedtuple("Item", "seq barcode name_en name_zh ccc permit origin")
+Declaration = namedtuple("Declaration", "decl_no bill_no import_date items")
+
+# ==========================================
+# CSV 表頭格式
+# ==========================================
+# 名稱 -> (欄位, 編碼, 分隔字元)
+CSV_VARIANTS = {
+    # parser.main 輸出 (Batch_Import_Declarations.csv)
+    "batch": (['報單號碼', '項次', '貨號/條碼', '貨物名稱', '稅則號列', '許可證號碼', '生產國別',
+               '申報注意事項', '原始檔名'], "utf-8-sig", ","),
+    # 加入產地欄位前的彙整檔 (All_Import_Data.csv)
+    "all_import": (['報單號碼', '項次', '貨號/條碼', '貨物名稱', '稅則號列', '許可證號碼',
+                    '申報注意事項', '原始檔名'], "utf-8-sig", ","),
+    # Import_Data.csv (產地在最後一欄)
+    "import_data": (['報單號碼', '項次', '貨號/條碼', '貨物名稱', '稅則號列', '許可證號碼',
+                     '申報注意事項', '生產國別'], "utf-8-sig", ","),
+    # 人工更正檔 (G2123_Corrected.csv)
+    "corrected": (['報單號碼', '項次', '貨號/條碼', '貨物名稱', '稅則號列', '許可證號碼', '生產國別',
+                   '申報注意事項'], "utf-8-sig", ","),
+    # Excel 另存的更正檔 (G2099_Corrected.csv)：Big5、Tab 分隔、條碼變成科學記號。
+    # import_tool 可自動偵測編碼與分隔符號，但條碼已失真 (匯入前檢查標示為 BARCODE_SCI)，不列入匯入基準測試
+    "corrected_excel": (['報單號碼', '項次', '貨號/條碼', '貨物名稱', '稅則號列', '許可證號碼', '生產國別',
+                         '申報注意事項'], "big5", "\t"),
+}
+IMPORTABLE_VARIANTS = ["batch", "all_import", "import_data", "corrected"]
+
+# ==========================================
+# 報單產生
+# ==========================================
+
+def _product(i):
+    """ 第 i 個產品 (由編號直接推算，不需保存整份目錄) """
+    head, material, zh, ccc, permit = _TEMPLATES[i % len(_TEMPLATES)]
+    v = i // len(_TEMPLATES)
+    color = _COLORS[v % len(_COLORS)]
+    size = _SIZES[(v // len(_COLORS)) % len(_SIZES)]
+    name_en = f"{head} -{color}- {material}"
+    name_zh = f"{zh}【{size}】" if size else zh
+    # 每個廠商代碼 10 萬個品項
+    barcode = ean13(f"{4549131 + i // 100000:07d}{i % 100000:05d}")
+    bucket = (i * 2654435761 >> 8) % 100
+    origin = next(name for name, upto in _ORIGINS if bucket < upto)
+    return barcode, name_en, name_zh, ccc, permit, origin
+
+
+def _decl_no(d):
+    # 最後一段 1 碼英文 + 5 碼流水號 (符合 validator.DECL_NO_RE)
+    return f"AA/13/{_OFFICES[d % len(_OFFICES)]}/{chr(ord('A') + d // 100000 % 26)}{d % 100000:05d}"
+
+
+def iter_declarations(n_items, seed=DEFAULT_SEED, skew=3.0, drift=0.002):
+    """ 依序產生報單，項次總數為 n_items """
+    rng = random.Random(seed)
+    n_products = max(len(_TEMPLATES) * 4, n_items // 8)
+    done = 0
+    d = 0
+    while done < n_items:
+        size = max(1, min(150, int(rng.lognormvariate(3.4, 0.7)), n_items - done))
+        picked = set()
+        items = []
+        while len(items) < size:
+            # u ** skew：少數熱門產品被大量報單重複申報
+            idx = int(n_products * rng.random() ** skew)
+            if idx in picked:
+                continue
+            picked.add(idx)
+            barcode, name_en, name_zh, ccc, permit, origin = _product(idx)
+            if rng.random() < drift:
+                ccc = _TEMPLATES[(idx + 1) % len(_TEMPLATES)][3]
+            items.append(Item(len(items) + 1, barcode, name_en, name_zh, ccc, permit, origin))
+        # 約每天 40 張報單
+        day = d // 40
+        import_date = f"{113 + day // 336}/{day // 28 % 12 + 1:02d}/{day % 28 + 1:02d}"
+        yield Declaration(_decl_no(d), f"SNLENBTLA{570000 + d:06d}", import_date, items)
+        done += size
+        d += 1
+
+
+def pdf_filename(decl):
+    return f"{decl.decl_no.rsplit('/', 1)[-1]}.pdf"
+
+
+def expected_row(decl, item):
+    """ parse_single_pdf 解析此項次應得的結果 (parser.main 的輸出欄位) """
+    return {
+        '報單號碼': decl.decl_no,
+        '項次': str(item.seq),
+        '貨號/條碼': item.barcode,
+        '貨物名稱': normalize_description(f"{item.name_en} {item.name_zh}"),
+        '稅則號列': item.ccc,
+        '許可證號碼': item.permit,
+        '生產國別': item.origin,
+        '申報注意事項': generate_sop(item.ccc, item.permit),
+        '原始檔名': pdf_filename(decl),
+    }
+
+
+def _noise(rng):
+    kind = rng.randrange(3)
+    if kind == 0:
+        return " " + "-" * rng.randint(20, 90) + " 項 次"
+    if kind == 1:
+        return f" {rng.randint(10, 99)} {rng.randint(1, 9)}CTN N/M"
+    return f" {rng.choice(_CONTAINER_OWNERS)}U{rng.randrange(10 ** 7):07d} 45G1"
+
+# ==========================================
+# CSV 輸出
+# ==========================================
+
+class _ChunkedCsv:
+    """ 依表頭格式寫出分檔 CSV；超過 rows_per_file 後於下一張報單開始新檔 """
+
+    def __init__(self, variant, out_dir, rows_per_file):
+        self.columns, self.encoding, self.delimiter = CSV_VARIANTS[variant]
+        self.variant = variant
+        self.out_dir = out_dir
+        self.rows_per_file = rows_per_file
+        self.paths = []
+        self._f = None
+        self._writer = None
+        self._rows = 0
+
+    def _roll(self):
+        self.close()
+        path = os.path.join(self.out_dir, f"{self.variant}_{len(self.paths) + 1:04d}.csv")
+        self._f = open(path, "w", encoding=self.encoding, errors="replace", newline="")
+        self._writer = csv.DictWriter(self._f, fieldnames=self.columns, delimiter=self.delimiter,
+                                      extrasaction="ignore")
+        self._writer.writeheader()
+        self.paths.append(path)
+        self._rows = 0
+
+    def write_declaration(self, rows):
+        if self._writer is None or self._rows >= self.rows_per_file:
+            self._roll()
+        if self.variant == "corrected_excel":
+            # Excel 以 6 位有效數字顯示 13 碼條碼，例如 4.54913E+12
+            rows = [dict(r, **{'貨號/條碼': f"{float(r['貨號/條碼']):.5E}"}) for r in rows]
+        self._writer.writerows(rows)
+        self._rows += len(rows)
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+# ==========================================
+# PDF 輸出 (純標準函式庫)
+# ==========================================
+
+PAGE_WIDTH = 595.32
+PAGE_HEIGHT = 841.92
+FONT_SIZE = 8
+LINE_PITCH = 11.3
+FIRST_ITEM_TOP = 377.1        # 第一頁表頭之後
+NEXT_ITEM_TOP = 142.4         # 第二頁起
+ITEM_BOTTOM = 800.0
+FOOTER_TOP = 551.0            # 最後一頁的總件數 / 標記區
+DESC_X = 31.8
+ORIGIN_X = 151.8
+CCC_X = 204.2
+DESC_MAX_WIDTH = 150.0        # 品名欄在稅則欄 (x≈202) 之前換行
+
+_PDF_FONT_OBJECTS = [
+    b"<< /Type /Font /Subtype /Type0 /BaseFont /MSung-Light /Encoding /UniCNS-UCS2-H "
+    b"/DescendantFonts [4 0 R] >>",
+    # UniCNS-UCS2-H 將 ASCII 對應到 CID 1~95 (半形)，其餘為全形
+    b"<< /Type /Font /Subtype /CIDFontType0 /BaseFont /MSung-Light "
+    b"/CIDSystemInfo << /Registry (Adobe) /Ordering (CNS1) /Supplement 0 >> "
+    b"/FontDescriptor 5 0 R /DW 1000 /W [1 95 500] >>",
+    b"<< /Type /FontDescriptor /FontName /MSung-Light /Flags 6 /FontBBox [-160 -249 1015 888] "
+    b"/ItalicAngle 0 /Ascent 880 /Descent -120 /CapHeight 880 /StemV 93 >>",
+]
+
+
+def _text_width(text, size=FONT_SIZE):
+    return sum(size / 2 if ord(ch) < 128 else size for ch in text)
+
+
+def _wrap(text, max_width=DESC_MAX_WIDTH):
+    lines, current = [], ""
+    for word in text.split():
+        candidate = f"{current} {word}" if current else word
+        if current and _text_width(candidate) > max_width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+def write_pdf(path, pages):
+    """ pages: [[(x, top, text), ...], ...]；座標以左上角為原點 (與 pdfplumber 相同) """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None] + _PDF_FONT_OBJECTS
+    kids = []
+    # 字元框下緣為 baseline + Descent，上緣再加字級 (pdfminer 的算法)
+    baseline_offset = FONT_SIZE * (1 - 0.120)
+    for words in pages:
+        ops = [f"BT /F1 {FONT_SIZE} Tf"]
+        for x, top, text in words:
+            y = PAGE_HEIGHT - top - baseline_offset
+            ops.append(f"1 0 0 1 {x:.2f} {y:.2f} Tm <{text.encode('utf-16-be').hex().upper()}> Tj")
+        ops.append("ET")
+        stream = zlib.compress("\n".join(ops).encode("ascii"))
+        content_no = len(objects) + 2
+        kids.append(f"{len(objects) + 1} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_no} 0 R >>".encode("ascii"))
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream)
+                       + stream + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode("ascii")
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for no, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % no + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def _first_page_header(decl, n_pages):
+    return [
+        (27.4, 30.0, "進口報單"),
+        (469.7, 30.0, "頁  次"), (496.0, 30.0, f"第 1 頁 / 共 {n_pages} 頁"),
+        (27.4, 64.4, "報單類別(2)"), (80.0, 64.4, "G1"),
+        (153.4, 64.4, "報單號碼(3)"), (202.8, 64.4, decl.decl_no),
+        (380.0, 64.4, "進口日期(15)"), (440.0, 64.4, decl.import_date),
+        (153.4, 76.0, "主提單號碼(9)"), (202.8, 76.0, decl.bill_no),
+        (27.4, 100.0, "納稅義務人(22)"), (120.0, 100.0, "統一編號 24563121"),
+        (27.4, 112.0, "賣方(25)"), (120.0, 112.0, "RYOHIN KEIKAKU CO., LTD."),
+        (27.4, 300.0, "生產國別(34)"),
+        (34.8, 322.0, "項"), (49.8, 322.0, "貨物名稱、商標(牌名)及規格等(35)"),
+        (201.2, 322.0, "輸出入貨品分類號列(38)"), (327.2, 322.0, "條件、幣別"), (388.8, 322.0, "淨重(公斤)"),
+        (34.8, 340.0, "次"), (204.2, 340.0, "稅　則　號　別"), (274.1, 340.0, "統計"),
+        (298.0, 340.0, "檢"), (312.2, 340.0, "單"),
+        (208.1, 352.0, "( 主 管 機 關 指 定 代 號 )"),
+    ]
+
+
+def _next_page_header(decl, page_no, n_pages):
+    return [
+        (27.4, 30.0, "進口報單"),
+        (158.5, 42.0, "報單號碼"), (203.5, 42.0, decl.decl_no),
+        (469.7, 42.0, "頁  次"), (496.0, 42.0, f"第 {page_no} 頁 / 共 {n_pages} 頁"),
+        (154.1, 54.0, "主提單號碼"), (203.5, 54.0, decl.bill_no),
+        (164.5, 78.0, "生產國別   輸出入許可文件號碼-項次"),
+        (34.8, 90.0, "項"), (49.8, 90.0, "貨物名稱、商標(牌名)及規格等"),
+        (201.2, 90.0, "輸出入貨品分類號列"), (327.2, 90.0, "條件、幣別"), (388.8, 90.0, "淨重(公斤)"),
+        (204.2, 105.0, "稅　則　號　別"), (274.1, 105.0, "統計"), (312.2, 105.0, "單"),
+        (34.8, 117.0, "次"), (208.1, 117.0, "( 主 管 機 關 指 定 代 號 )"),
+    ]
+
+
+def _item_words(item, top, rng):
+    qty = rng.randint(1, 80) * 12
+    price = rng.randint(50, 3000)
+    words = [
+        (DESC_X, top, f"{item.seq}."), (ORIGIN_X, top, item.origin),
+        (322.8, top, "FOB"), (347.5, top, "JPY"),
+        (401.5, top, f"{qty * rng.uniform(0.01, 0.5):.2f}KGM"), (521.4, top, "6.2%"), (556.0, top, "31"),
+        (DESC_X, top + LINE_PITCH, item.barcode), (353.5, top + LINE_PITCH, f"{price:,}"),
+        (407.5, top + LINE_PITCH, f"{qty}PCE"), (484.7, top + LINE_PITCH, f"{price * qty:,}"),
+    ]
+    if item.permit:
+        words.append((CCC_X, top, item.permit))
+    desc_top = top + 2 * LINE_PITCH
+    words.append((CCC_X, desc_top, item.ccc))
+    for line in _wrap(item.name_en) + _wrap(item.name_zh):
+        words.append((DESC_X, desc_top, line))
+        desc_top += LINE_PITCH
+    words.append((27.4, desc_top, "-" * 38))
+    return words, desc_top + LINE_PITCH + 2
+
+
+def _footer_words(decl, rng):
+    top = FOOTER_TOP
+    return [
+        (28.1, top, "總件數/單位(47)"), (120.4, top, f"{len(decl.items)} {rng.randint(1, 9)}CTN"),
+        (200.0, top, "包裝說明(48)"),
+        (30.4, top + 12, "標記(50) / 貨櫃號碼(51) / 其他申報事項(52)"),
+        (DESC_X, top + 24, "N/M"),
+        (DESC_X, top + 36, "-" * 39),
+        (DESC_X, top + 48, f"{rng.choice(_CONTAINER_OWNERS)}U{rng.randrange(10 ** 7):07d}"),
+        (115.8, top + 48, "45G1"), (145.8, top + 48, "FCL/FCL"),
+    ]
+
+
+def declaration_pdf(path, decl, rng):
+    """ 寫出一張報單的 PDF，回傳頁數 """
+    # 先排版 (決定總頁數) 再加上表頭 "第 N 頁 / 共 M 頁"
+    bodies = [[]]
+    top = FIRST_ITEM_TOP
+    for item in decl.items:
+        words, bottom = _item_words(item, top, rng)
+        if bottom > ITEM_BOTTOM and bodies[-1]:
+            bodies.append([])
+            words, bottom = _item_words(item, NEXT_ITEM_TOP, rng)
+        bodies[-1].extend(words)
+        top = bottom
+    if top > FOOTER_TOP - 8:
+        bodies.append([])  # 最後一頁放不下頁尾
+    bodies[-1].extend(_footer_words(decl, rng))
+
+    n_pages = len(bodies)
+    pages = []
+    for page_no, body in enumerate(bodies, start=1):
+        header = _first_page_header(decl, n_pages) if page_no == 1 else _next_page_header(decl, page_no, n_pages)
+        pages.append(header + body)
+    write_pdf(path, pages)
+    return n_pages
+
+# ==========================================
+# 產生資料集
+# ==========================================
+
+def generate(out_dir, n_items, variants=("batch",), rows_per_file=100000, pdf_decls=20,
+             seed=DEFAULT_SEED, noise=0.05, skew=3.0, drift=0.002, progress=True):
+    """
+    產生資料集並回傳 manifest (同時寫入 out_dir/manifest.json)：
+      csv: {格式: [檔案路徑, ...]}、pdf: [{path, pages, items}]、truth: PDF 的預期解析結果
+    """
+    csv_dir = os.path.join(out_dir, "csv")
+    pdf_dir = os.path.join(out_dir, "pdf")
+    os.makedirs(csv_dir, exist_ok=True)
+    writers = [_ChunkedCsv(v, csv_dir, rows_per_file) for v in variants]
+    rng = random.Random(seed + 1)
+
+    truth_path = None
+    truth_file = truth_writer = None
+    if pdf_decls:
+        os.makedirs(pdf_dir, exist_ok=True)
+        truth_path = os.path.join(pdf_dir, "truth.csv")
+        truth_file = open(truth_path, "w", encoding="utf-8-sig", newline="")
+        truth_writer = csv.DictWriter(truth_file, fieldnames=CSV_VARIANTS["batch"][0])
+        truth_writer.writeheader()
+
+    t0 = time.perf_counter()
+    n_decls = 0
+    done = 0
+    pdfs = []
+    try:
+        for decl in iter_declarations(n_items, seed, skew, drift):
+            rows = [expected_row(decl, item) for item in decl.items]
+            if n_decls < pdf_decls:
+                path = os.path.join(pdf_dir, pdf_filename(decl))
+                pages = declaration_pdf(path, decl, rng)
+                pdfs.append({"path": path, "pages": pages, "items": len(rows)})
+                truth_writer.writerows(rows)
+            if noise:
+                for r in rows:
+                    if rng.random() < noise:
+                        r['貨物名稱'] += _noise(rng)
+            for w in writers:
+                w.write_declaration(rows)
+
+            n_decls += 1
+            done += len(rows)
+            if progress and n_decls % 2000 == 0:
+                rate = done / (time.perf_counter() - t0)
+                print(f"   已產生 {done:,} / {n_items:,} 項次 ({rate:,.0f} 項/秒)", end="\r")
+    finally:
+        for w in writers:
+            w.close()
+        if truth_file is not None:
+            truth_file.close()
+
+    manifest = {
+        "items": done,
+        "declarations": n_decls,
+        "seed": seed,
+        "elapsed_sec": round(time.perf_counter() - t0, 3),
+        "csv": {w.variant: w.paths for w in writers},
+        "pdf": pdfs,
+        "truth": truth_path,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def main():
+    sys.stdout.reconfigure(encoding="utf-8")
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--items", type=int, default=10000, help="項次總數 (1 萬 ~ 1000 萬)")
+    ap.add_argument("--out", default="synthetic_declarations")
+    ap.add_argument("--variants", default=",".join(CSV_VARIANTS),
+                    help=f"CSV 表頭格式，逗號分隔 (可用: {', '.join(CSV_VARIANTS)})")
+    ap.add_argument("--rows-per-file", type=int, default=100000)
+    ap.add_argument("--pdf-decls", type=int, default=20, help="輸出 PDF 的報單張數 (0 = 不輸出)")
+    ap.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    ap.add_argument("--noise", type=float, default=0.05, help="CSV 品名夾帶版面殘留的比例")
+    ap.add_argument("--skew", type=float, default=3.0, help="熱門產品集中程度 (1 = 平均)")
+    ap.add_argument("--drift", type=float, default=0.002, help="改申報其他稅則的項次比例")
+    args = ap.parse_args()
+
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    unknown = [v for v in variants if v not in CSV_VARIANTS]
+    if unknown:
+        ap.error(f"未知的 CSV 格式: {', '.join(unknown)}")
+
+    manifest = generate(args.out, args.items, variants, args.rows_per_file, args.pdf_decls,
+                        args.seed, args.noise, args.skew, args.drift)
+    print(f"\n✅ {manifest['items']:,} 項次 / {manifest['declarations']:,} 張報單 "
+          f"({manifest['elapsed_sec']:.1f} 秒) -> {os.path.abspath(args.out)}")
+    for variant, paths in manifest["csv"].items():
+        print(f"   CSV {variant}: {len(paths)} 檔")
+    if manifest["pdf"]:
+        pages = sum(p["pages"] for p in manifest["pdf"])
+        print(f"   PDF: {len(manifest['pdf'])} 檔 / {pages} 頁 (預期結果: {manifest['truth']})")
+
+
+if __name__ == "__main__":
+    main()
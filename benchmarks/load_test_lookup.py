@@ -0,0 +1,165 @@
+"""
+條碼查詢服務壓測 (lookup_service.py)
+
+在本程序內啟動 HTTP 服務，以 N 個執行緒 (keep-alive 連線) 連續送出查詢，
+量測每秒請求數與延遲百分位數。資料庫預設使用 SQLite 替身 (自動填入合成資料)，
+加上 --mysql 則改用 .env 設定的 MySQL (需已有資料)。
+
+查詢對象依 Zipf 分布挑選 (少數熱門條碼被反覆查詢)，貼近掃描站實際情況；
+--no-cache 可關閉熱門條碼快取，比較兩者差異。
+
+用法:
+    python benchmarks/load_test_lookup.py
+    python benchmarks/load_test_lookup.py --threads 16 --requests 20000 --batch 10
+    python benchmarks/load_test_lookup.py --mysql --pool-size 8
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database import ConnectionPool  # noqa: E402
+import lookup_service  # noqa: E402
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return sorted_values[idx]
+
+
+def _zipf_picker(items, s, rng):
+    from itertools import accumulate
+
+    cum_weights = list(accumulate(1.0 / (rank ** s) for rank in range(1, len(items) + 1)))
+    return lambda: rng.choices(items, cum_weights=cum_weights, k=1)[0]
+
+
+def _mysql_barcodes(pool, limit):
+    with pool.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT barcode FROM products LIMIT %s", (limit,))
+            return [r['barcode'] for r in cursor.fetchall()]
+
+
+def _worker(port, n_requests, batch, pick, latencies, errors, lock):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    local = []
+    local_errors = 0
+    for _ in range(n_requests):
+        if batch == 1:
+            method, path, body = "GET", f"/lookup?barcode={pick()}", None
+        else:
+            method, path, body = "POST", "/lookup", json.dumps([pick() for _ in range(batch)])
+        t = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status != 200:
+                local_errors += 1
+        except (OSError, http.client.HTTPException):
+            local_errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        local.append((time.perf_counter() - t) * 1000)
+    conn.close()
+    with lock:
+        latencies.extend(local)
+        errors[0] += local_errors
+
+
+def run(args):
+    tmpdir = None
+    if args.mysql:
+        pool = ConnectionPool(args.pool_size)
+        barcodes = _mysql_barcodes(pool, args.products)
+    else:
+        import sqlite_standin
+
+        tmpdir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmpdir.name, "lookup_bench.sqlite")
+        t = time.perf_counter()
+        barcodes = sqlite_standin.seed(db_path, products=args.products,
+                                       declarations=args.declarations, items_per_decl=20)
+        print(f"🗄️ SQLite 替身: {args.products:,} 條碼 / {args.declarations * 20:,} 明細 "
+              f"({time.perf_counter() - t:.1f} 秒)")
+        pool = ConnectionPool(args.pool_size, factory=sqlite_standin.connection_factory(db_path))
+
+    if not barcodes:
+        print("❌ 資料庫中沒有條碼可查詢")
+        return 1
+
+    cache_size = 0 if args.no_cache else lookup_service.CACHE_SIZE
+    service = lookup_service.LookupService(pool, cache_size=cache_size)
+    server = lookup_service.make_server(service, port=0)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    rng = random.Random(7)
+    # 查無資料的條碼也要有一定比例 (新品)
+    pool_items = barcodes + [f"999{i:010d}" for i in range(len(barcodes) // 20)]
+    rng.shuffle(pool_items)
+    pick = _zipf_picker(pool_items, args.zipf, rng)
+
+    per_thread = args.requests // args.threads
+    latencies, errors, lock = [], [0], threading.Lock()
+    workers = [
+        threading.Thread(target=_worker, args=(port, per_thread, args.batch, pick, latencies, errors, lock))
+        for _ in range(args.threads)
+    ]
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - t0
+
+    server.shutdown()
+    server.server_close()
+    cache_stats = service.cache.stats()
+    service.close()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+    latencies.sort()
+    total = len(latencies)
+    print("-" * 60)
+    print(f"執行緒 {args.threads}  連線池 {args.pool_size}  每請求 {args.batch} 條碼  "
+          f"快取 {'關閉' if args.no_cache else '開啟'}")
+    print(f"請求 {total:,} 次 / {elapsed:.2f} 秒 = {total / elapsed:,.0f} req/s "
+          f"({total * args.batch / elapsed:,.0f} 條碼/s)，錯誤 {errors[0]}")
+    print(f"延遲 ms: p50 {_percentile(latencies, 0.50):.2f}  p95 {_percentile(latencies, 0.95):.2f}  "
+          f"p99 {_percentile(latencies, 0.99):.2f}  max {latencies[-1] if latencies else 0:.2f}")
+    print(f"快取: 命中率 {cache_stats['hit_rate']:.1%} ({cache_stats['hits']:,} / "
+          f"{cache_stats['hits'] + cache_stats['misses']:,})，常駐 {cache_stats['size']:,} 筆")
+    return 1 if errors[0] else 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--requests", type=int, default=5000, help="總請求數")
+    ap.add_argument("--batch", type=int, default=1, help="每個請求查詢的條碼數 (>1 時用 POST)")
+    ap.add_argument("--pool-size", type=int, default=4)
+    ap.add_argument("--products", type=int, default=20000)
+    ap.add_argument("--declarations", type=int, default=2000)
+    ap.add_argument("--zipf", type=float, default=1.1, help="熱門程度 (越大越集中)")
+    ap.add_argument("--no-cache", action="store_true")
+    ap.add_argument("--mysql", action="store_true", help="使用 .env 設定的 MySQL")
+    args = ap.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+import re
+import random
+import sqlite3
+from datetime import date, datetime
+from functools import lru_cache
+
+# ==========================================
+# SQLite 替身 (壓測 / 基準測試用，不需 MySQL)
+# ==========================================
+# 提供與 create_connection() 回傳的 pymysql 連線相容的介面：
+#   conn.cursor() 可用 with、參數佔位符 %s、DictCursor 風格的列、ping / open / commit / rollback
+#   conn.cursor(SSCursor) 回傳 tuple 列 (validator.build_history_index 使用)
+# 本專案送出的 MySQL 語法 (import_tool / summary / description) 由 _translate() 改寫成 SQLite 語法：
+#   INSERT IGNORE、ON DUPLICATE KEY UPDATE (含 LAST_INSERT_ID)、UPDATE ... JOIN、
+#   information_schema 欄位查詢、CREATE TABLE 的 KEY / FULLTEXT KEY / CHARSET、SET SESSION (忽略)；
+#   DATE_FORMAT / NOW 等以自訂函式提供，MATCH ... AGAINST 片語搜尋以逐列子字串比對代替 (無全文索引)。
+# 與 MySQL 不同處：upsert 的 rowcount 一律為 1 (MySQL 更新時為 2)，只影響匯入的新增 / 更新計數。
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS products (
+        product_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        barcode TEXT NOT NULL UNIQUE,
+        name_en TEXT NOT NULL DEFAULT '',
+        description_id INTEGER,
+        default_ccc_code TEXT,
+        default_permit_code TEXT,
+        risk_note TEXT,
+        origin_country TEXT
+    );
+    CREATE TABLE IF NOT EXISTS product_descriptions (
+        description_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        desc_hash BLOB NOT NULL UNIQUE,
+        description TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS declarations (
+        declaration_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        decl_no TEXT NOT NULL UNIQUE,
+        import_date TEXT,
+        status TEXT
+    );
+    CREATE TABLE IF NOT EXISTS declaration_items (
+        item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        declaration_id INTEGER NOT NULL,
+        product_id INTEGER NOT NULL,
+        seq_no INTEGER NOT NULL,
+        applied_ccc_code TEXT,
+        applied_permit_no TEXT,
+        UNIQUE (declaration_id, seq_no)
+    );
+    CREATE INDEX IF NOT EXISTS idx_products_description ON products (description_id);
+    CREATE INDEX IF NOT EXISTS idx_items_product ON declaration_items (product_id);
+    CREATE INDEX IF NOT EXISTS idx_decl_date ON declarations (import_date);
+"""
+
+def _dict_factory(cursor, row):
+    return {col[0]: value for col, value in zip(cursor.description, row)}
+
+# ==========================================
+# MySQL 函式
+# ==========================================
+
+def _concat_ws(sep, *parts):
+    # SQLite 3.44 之前沒有 CONCAT_WS；與 MySQL 相同略過 NULL
+    return sep.join(str(p) for p in parts if p is not None)
+
+
+def _date_format(value, fmt):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return value.strftime(fmt.replace("%i", "%M"))
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _left(text, n):
+    return None if text is None else str(text)[:n]
+
+
+def _match_phrase(text, query):
+    # MATCH(col) AGAINST ('"片語"' IN BOOLEAN MODE)：ngram 片語比對，不分大小寫
+    if text is None or query is None:
+        return 0
+    return int(query.strip().strip('"').casefold() in text.casefold())
+
+
+_FUNCTIONS = [
+    ("CONCAT_WS", -1, _concat_ws),
+    ("DATE_FORMAT", 2, _date_format),
+    ("NOW", 0, _now),
+    ("MYSQL_LEFT", 2, _left),
+    ("MYSQL_MATCH_PHRASE", 2, _match_phrase),
+]
+
+# ==========================================
+# MySQL -> SQLite 語法改寫
+# ==========================================
+
+_INSERT_IGNORE_RE = re.compile(r"\bINSERT\s+IGNORE\s+INTO\b", re.IGNORECASE)
+_LAST_INSERT_ID_RE = re.compile(
+    r"ON\s+DUPLICATE\s+KEY\s+UPDATE\s+(\w+)\s*=\s*LAST_INSERT_ID\(\s*\1\s*\)", re.IGNORECASE)
+_ON_DUP_RE = re.compile(r"ON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.IGNORECASE)
+_VALUES_FUNC_RE = re.compile(r"\bVALUES\((\w+)\)", re.IGNORECASE)
+_UPDATE_JOIN_RE = re.compile(
+    r"^\s*UPDATE\s+(\w+)\s+(\w+)\s+JOIN\s+(\(.*\))\s+(\w+)\s+ON\s+(.*?)\s+SET\s+(.*?)\s*$",
+    re.IGNORECASE | re.DOTALL)
+_INFO_COLUMNS_RE = re.compile(
+    r"FROM\s+information_schema\.COLUMNS\s+WHERE\s+TABLE_SCHEMA\s*=\s*DATABASE\(\)\s+"
+    r"AND\s+TABLE_NAME\s*=\s*'(\w+)'\s+AND\s+COLUMN_NAME\s*=\s*'(\w+)'", re.IGNORECASE)
+_FULLTEXT_DEF_RE = re.compile(
+    r",\s*FULLTEXT\s+KEY\s+\w+\s*\([^()]*\)(?:\s+WITH\s+PARSER\s+\w+)?", re.IGNORECASE)
+_INDEX_DEF_RE = re.compile(r",\s*KEY\s+\w+\s*\((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_UNIQUE_KEY_RE = re.compile(r"\bUNIQUE\s+KEY\s+\w+\s*\(", re.IGNORECASE)
+_AUTO_PK_RE = re.compile(r"\bINT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b", re.IGNORECASE)
+_CHARSET_RE = re.compile(r"\)\s*DEFAULT\s+CHARSET\s*=\s*\w+", re.IGNORECASE)
+_LEFT_FUNC_RE = re.compile(r"\bLEFT\(", re.IGNORECASE)
+_MATCH_RE = re.compile(r"\bMATCH\s*\(\s*([\w.]+)\s*\)\s+AGAINST\s*\(\s*\?\s+IN\s+BOOLEAN\s+MODE\s*\)",
+                       re.IGNORECASE)
+_SET_SESSION_RE = re.compile(r"^\s*SET\s+SESSION\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=512)
+def _translate(sql, has_params):
+    """ 回傳 (SQLite 語法, RETURNING 欄位或 None)；同一句 SQL 只改寫一次 """
+    if has_params:
+        # 與 pymysql 相同：有參數時才做 % 格式化 (%% -> %)
+        sql = sql.replace("%s", "?").replace("%%", "%")
+    returning = None
+    if _SET_SESSION_RE.match(sql):
+        # 連線層級設定 (net_write_timeout / innodb_ft_enable_stopword) 在 SQLite 沒有對應
+        return "SELECT 1 WHERE 0", None
+
+    sql = _INSERT_IGNORE_RE.sub("INSERT OR IGNORE INTO", sql)
+
+    m = _LAST_INSERT_ID_RE.search(sql)
+    if m:
+        # 不論新增或已存在都取回 id：以 RETURNING 取代 LAST_INSERT_ID(expr)
+        returning = m.group(1)
+        sql = (sql[:m.start()] + f"ON CONFLICT DO UPDATE SET {returning} = {returning} "
+               f"RETURNING {returning}" + sql[m.end():])
+    elif _ON_DUP_RE.search(sql):
+        head, tail = _ON_DUP_RE.split(sql, maxsplit=1)
+        sql = head + "ON CONFLICT DO UPDATE SET" + _VALUES_FUNC_RE.sub(r"excluded.\1", tail)
+
+    m = _UPDATE_JOIN_RE.match(sql)
+    if m:
+        table, alias, subquery, sub_alias, on_cond, assignments = m.groups()
+        # SQLite 的 SET 左邊不能帶別名
+        assignments = re.sub(rf"\b{alias}\.(\w+)\s*=", r"\1 =", assignments)
+        sql = (f"UPDATE {table} AS {alias} SET {assignments} "
+               f"FROM {subquery} AS {sub_alias} WHERE {on_cond}")
+
+    m = _INFO_COLUMNS_RE.search(sql)
+    if m:
+        sql = (sql[:m.start()] + f"FROM pragma_table_info('{m.group(1)}') WHERE name = '{m.group(2)}'"
+               + sql[m.end():])
+
+    if re.match(r"\s*CREATE\s+TABLE", sql, re.IGNORECASE):
+        sql = _FULLTEXT_DEF_RE.sub("", sql)
+        sql = _INDEX_DEF_RE.sub("", sql)
+        sql = _UNIQUE_KEY_RE.sub("UNIQUE (", sql)
+        sql = _AUTO_PK_RE.sub("INTEGER PRIMARY KEY AUTOINCREMENT", sql)
+        sql = _CHARSET_RE.sub(")", sql)
+
+    sql = _LEFT_FUNC_RE.sub("MYSQL_LEFT(", sql)
+    sql = _MATCH_RE.sub(r"MYSQL_MATCH_PHRASE(\1, ?)", sql)
+    return sql, returning
+
+
+def _adapt_param(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat(sep=" ") if isinstance(value, datetime) else value.isoformat()
+    return value
+
+
+class StandinCursor:
+    def __init__(self, raw, tuple_rows=False):
+        self._cur = raw.cursor()
+        if tuple_rows:
+            self._cur.row_factory = None
+        self._returned_id = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    @property
+    def lastrowid(self):
+        if self._returned_id is not None:
+            return self._returned_id
+        return self._cur.lastrowid
+
+    def execute(self, sql, params=None):
+        sql, returning = _translate(sql, params is not None)
+        self._returned_id = None
+        self._cur.execute(sql, tuple(_adapt_param(p) for p in (params or ())))
+        if returning:
+            row = self._cur.fetchone()
+            self._returned_id = row[returning] if isinstance(row, dict) else row[0]
+        return self._cur.rowcount
+
+    def executemany(self, sql, seq_of_params):
+        sql, _ = _translate(sql, True)
+        self._cur.executemany(sql, seq_of_params)
+        return self._cur.rowcount
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def fetchmany(self, size):
+        return self._cur.fetchmany(size)
+
+    def close(self):
+        self._cur.close()
+
+
+class StandinConnection:
+    def __init__(self, path):
+        # 每條連線只會被連線池借給一個執行緒使用，但借出 / 歸還跨執行緒
+        self._raw = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._raw.row_factory = _dict_factory
+        for name, n_args, func in _FUNCTIONS:
+            self._raw.create_function(name, n_args, func)
+        self.open = True
+
+    def cursor(self, cursor_class=None):
+        # 傳入 pymysql 的 SSCursor / Cursor 等非 Dict cursor 時回傳 tuple 列
+        tuple_rows = cursor_class is not None and "Dict" not in getattr(cursor_class, "__name__", "")
+        return StandinCursor(self._raw, tuple_rows)
+
+    def ping(self, reconnect=False):
+        if not self.open:
+            raise sqlite3.ProgrammingError("connection closed")
+
+    def commit(self):
+        self._raw.commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def close(self):
+        if self.open:
+            self._raw.close()
+            self.open = False
+
+
+def connection_factory(path):
+    """ 回傳可交給 ConnectionPool(factory=...) 的函式 """
+    return lambda: StandinConnection(path)
+
+
+def create_schema(path):
+    raw = sqlite3.connect(path)
+    try:
+        raw.executescript(SCHEMA)
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def ean13(prefix12):
+    digits = [int(c) for c in prefix12]
+    check = (10 - sum(d * (3 if i % 2 else 1) for i, d in enumerate(digits)) % 10) % 10
+    return f"{prefix12}{check}"
+
+
+_NAMES = [("PAPER BASKET Body：Paper Frame：Steel", "編織收納籃"),
+          ("STORAGE BOX Fabric：Polyester, Cotton, Rayon Coating：Polyethylene", "附蓋收納盒"),
+          ("Wire Basket -Wooden Handle - Black- Body：Steel", "收納籃"),
+          ("Faux Bull Leather Reversible Desk Mat Polyvinyl chloride", "雙面桌墊【35×70cm】"),
+          ("PET TOY Ball main unit: Polyester", "貓用玩具"),
+          ("Stackable Storage Container-Clear- Polypropylene", "堆疊式小物收納盒"),
+          ("Foaming Pump Bottle PET Polypropylene", "泡沫按壓瓶"),
+          ("CI Wire Flower -Rose-Body：Steel Coating：Epoxy resin", "鐵製裝飾花")]
+_CCC = ["0902.10.10.00-4", "1902.30.10.00-8", "2103.10.00.00-6", "1905.90.90.00-3", "0804.50.20.00-9"]
+_PERMITS = ["", "", "CI123456789012", "IFB12345678901"]
+_ORIGINS = ["TW", "JP", "TH", "VN", "KR"]
+
+
+def seed(path, products=20000, declarations=2000, items_per_decl=20, rng_seed=1):
+    """ 建立資料表並填入合成資料；回傳全部條碼 (壓測時用來挑查詢對象) """
+    from description import description_hash
+
+    rng = random.Random(rng_seed)
+    create_schema(path)
+    raw = sqlite3.connect(path)
+    try:
+        # 品名種類遠少於產品數 (同款不同色 / 尺寸共用品名)；與 --migrate 後相同，品名只存於品名表
+        variants = [f"{en} -{n}- {zh}" for n in range(max(1, products // 20)) for en, zh in _NAMES]
+        raw.executemany(
+            "INSERT OR IGNORE INTO product_descriptions (desc_hash, description) VALUES (?, ?)",
+            ((description_hash(text), text) for text in variants),
+        )
+        barcodes = [ean13(f"471{i:09d}") for i in range(products)]
+        raw.executemany(
+            "INSERT OR IGNORE INTO products "
+            "(barcode, name_en, description_id, default_ccc_code, default_permit_code, risk_note, origin_country) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (b, "", v + 1, rng.choice(_CCC), rng.choice(_PERMITS),
+                 "需檢附成分表" if i % 50 == 0 else "", rng.choice(_ORIGINS))
+                for i, b in enumerate(barcodes)
+                for v in (rng.randrange(len(variants)),)
+            ),
+        )
+        raw.executemany(
+            "INSERT OR IGNORE INTO declarations (decl_no, import_date, status) VALUES (?, ?, '已放行')",
+            (
+                (f"AA/25/{d % 1000:03d}/{d:05d}", f"2025-{1 + d % 12:02d}-{1 + d % 28:02d}")
+                for d in range(declarations)
+            ),
+        )
+        raw.executemany(
+            "INSERT OR IGNORE INTO declaration_items "
+            "(declaration_id, product_id, seq_no, applied_ccc_code, applied_permit_no) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                (d + 1, rng.randrange(products) + 1, seq, rng.choice(_CCC), rng.choice(_PERMITS))
+                for d in range(declarations)
+                for seq in range(1, items_per_decl + 1)
+            ),
+        )
+        raw.commit()
+    finally:
+        raw.close()
+    return barcodes
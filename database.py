@@ -1,41 +1,62 @@
-import pymysql
 import os
 import sys
 import socket
-from dotenv import load_dotenv
 from pathlib import Path
 
-# 強制顯示輸出
-sys.stdout.reconfigure(encoding='utf-8')
+# pymysql / dotenv 延遲到第一次連線才載入，避免拖慢 GUI 與 CLI 啟動
+_env_loaded = False
 
-# 載入 .env
-env_path = Path('.') / '.env'
-load_dotenv(dotenv_path=env_path)
+def _prepare_runtime():
+    """ 第一次連線前才執行：設定輸出編碼並載入 .env (只做一次) """
+    global _env_loaded
+    if _env_loaded:
+        return
+    # 強制顯示輸出 (pythonw 下 stdout / stderr 可能為 None)
+    for stream in (sys.stdout, sys.stderr):
+        if stream is not None and hasattr(stream, "reconfigure"):
+            stream.reconfigure(encoding='utf-8')
+
+    # 載入 .env
+    from dotenv import load_dotenv
+    env_path = Path('.') / '.env'
+    load_dotenv(dotenv_path=env_path)
+    _env_loaded = True
+
+def _log(message):
+    """
+    連線診斷訊息一律寫到 stderr：stdout 留給呼叫端的輸出
+    (例如 lookup_service 的 JSON / JSON lines)，不被診斷訊息混入。
+    """
+    if sys.stderr is not None:
+        print(message, file=sys.stderr)
 
 def check_port_open(host, port):
     """ [診斷] 檢查遠端主機的 3306 Port 是否有開 (排除防火牆問題) """
-    print(f"[Network Check] Pinging {host}:{port}...")
+    _log(f"[Network Check] Pinging {host}:{port}...")
     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     sock.settimeout(3) # 設定 3 秒超時
     try:
         result = sock.connect_ex((host, port))
         if result == 0:
-            print(f"[Network Check] ✅ Port {port} is OPEN. Network is OK.")
+            _log(f"[Network Check] ✅ Port {port} is OPEN. Network is OK.")
             return True
         else:
-            print(f"[Network Check] ❌ Port {port} is CLOSED or BLOCKED (ErrCode: {result}).")
-            print("   -> 請檢查雲端主機的「安全性群組 (Security Group)」是否放行 3306 Port。")
+            _log(f"[Network Check] ❌ Port {port} is CLOSED or BLOCKED (ErrCode: {result}).")
+            _log("   -> 請檢查雲端主機的「安全性群組 (Security Group)」是否放行 3306 Port。")
             return False
     except Exception as e:
-        print(f"[Network Check] ❌ Error: {e}")
+        _log(f"[Network Check] ❌ Error: {e}")
         return False
     finally:
         sock.close()
 
 def create_connection():
+    _prepare_runtime()
+    import pymysql
+
     connection = None
     try:
-        print("[Step 2] Reading .env config...")
+        _log("[Step 2] Reading .env config...")
         db_host = os.getenv("DB_HOST")
         db_user = os.getenv("DB_USER")
         db_pass = os.getenv("DB_PASSWORD")
@@ -46,7 +67,7 @@ def create_connection():
         if not check_port_open(db_host, db_port):
             return None
 
-        print(f"[Step 3] Connecting using PyMySQL... (Host: {db_host}, User: {db_user})")
+        _log(f"[Step 3] Connecting using PyMySQL... (Host: {db_host}, User: {db_user})")
         
         # 2. 建立連線 (使用 pymysql)
         connection = pymysql.connect(
@@ -61,13 +82,13 @@ def create_connection():
         )
         
         if connection.open:
-            print("[Success] ✅ MySQL connection established!")
+            _log("[Success] ✅ MySQL connection established!")
             return connection
             
     except pymysql.MySQLError as e:
-        print(f"[MySQL Error] Code: {e.args[0]}, Message: {e.args[1]}")
+        _log(f"[MySQL Error] Code: {e.args[0]}, Message: {e.args[1]}")
     except Exception as e:
-        print(f"[System Error] {e}")
+        _log(f"[System Error] {e}")
     
     return None
 
@@ -75,7 +96,80 @@ def close_connection(connection):
     if connection and connection.open:
         connection.close()
 
+class ConnectionPool:
+    """
+    簡易連線池 (給常駐服務使用，例如 lookup_service)：
+    最多 size 條連線，用完放回重複使用，取出時先 ping 確認連線仍有效。
+    factory 預設為 create_connection，可替換成其他相容 DB-API 的連線 (例如壓測用的 SQLite)。
+    """
+
+    def __init__(self, size=4, factory=None, acquire_timeout=10):
+        import queue
+        import threading
+
+        self._factory = factory or create_connection
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._acquire_timeout = acquire_timeout
+        self.size = size
+
+    def _checkout(self):
+        if not self._slots.acquire(timeout=self._acquire_timeout):
+            raise TimeoutError("連線池已滿，等待逾時")
+        try:
+            while not self._idle.empty():
+                conn = self._idle.get_nowait()
+                try:
+                    conn.ping(reconnect=True)
+                    return conn
+                except Exception:
+                    close_connection(conn)
+            conn = self._factory()
+            if conn is None:
+                raise ConnectionError("無法建立資料庫連線")
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _checkin(self, conn, broken=False):
+        try:
+            if broken:
+                close_connection(conn)
+            else:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def connection(self):
+        """ with pool.connection() as conn: ... """
+        from contextlib import contextmanager
+
+        @contextmanager
+        def _borrow():
+            conn = self._checkout()
+            broken = False
+            try:
+                yield conn
+            except Exception:
+                broken = True
+                try:
+                    conn.rollback()
+                    broken = False
+                except Exception:
+                    pass
+                raise
+            finally:
+                self._checkin(conn, broken)
+
+        return _borrow()
+
+    def close_all(self):
+        while not self._idle.empty():
+            close_connection(self._idle.get_nowait())
+
 if __name__ == "__main__":
+    _prepare_runtime()
     print("🚀 Program started (PyMySQL Mode)")
     
     conn = create_connection()
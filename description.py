@@ -0,0 +1,286 @@
+import re
+import sys
+import hashlib
+from functools import lru_cache
+
+# ==========================================
+# 貨物名稱正規化 / 去重儲存
+# ==========================================
+# parse_single_pdf 抽出的貨物名稱常夾帶版面殘留：
+#   - 項次分隔線 "------" (之後的文字屬於頁尾 / 下一區塊)
+#   - 跨頁帶入的表頭 "項 次"、貨櫃號碼 "SNBU8247505 45G1"、件數標記 "91 4CTN N/M"、"1,05 1CTN N/M"
+# normalize_description() 只去除這些雜訊，品名本身 (含空白、全形標點、英 / 中文順序) 原樣保留。
+#
+# 執行 `python description.py --migrate` 後：
+#   - 品名只存在 product_descriptions (每種品名一列，以 SHA-1 去重)，products 只記 description_id，
+#     products.name_en 清空；查詢 / 匯出以 JOIN 取回品名 (見 name_columns)
+#   - 品名表有 FULLTEXT (ngram) 索引，品名搜尋不再逐列 LIKE (見 name_search_condition)
+#   - 舊資料原文照搬 (不正規化)，`--rollback` 可把品名寫回 products.name_en 並移除新增的表格 / 欄位
+# 匯入需先完成 --migrate (匯入流程不做 DDL)。
+
+DESCRIPTION_DDL = """
+    CREATE TABLE IF NOT EXISTS product_descriptions (
+        description_id INT AUTO_INCREMENT PRIMARY KEY,
+        desc_hash BINARY(20) NOT NULL,
+        description TEXT NOT NULL,
+        UNIQUE KEY uk_desc_hash (desc_hash),
+        FULLTEXT KEY ft_description (description) WITH PARSER ngram
+    ) DEFAULT CHARSET=utf8mb4
+"""
+
+# 已 --migrate 時查詢品名的方式；description_id 為 NULL 的列 (轉換中斷) 退回 products.name_en
+DESC_JOIN_SQL = "LEFT JOIN product_descriptions pd ON p.description_id = pd.description_id"
+DISPLAY_NAME_SQL = "COALESCE(pd.description, p.name_en)"
+
+# ngram 索引的詞長 (MySQL ngram_token_size 預設 2)；較短的關鍵字改用 LIKE
+FULLTEXT_MIN_CHARS = 2
+
+# 項次分隔線：3 個以上連續的 "-" (可能被切成多段)，之後的文字屬於頁尾 / 下一區塊
+_SEPARATOR_RE = re.compile(r"\s-{3,}(?:\s+-{3,})*.*$")
+# 緊接在文字後的分隔線 (例如 "寵物床------")
+_DASH_RUN_RE = re.compile(r"\s*-{3,}\s*")
+# 跨頁帶入的表頭
+_HEADER_TAIL_RE = re.compile(r"\s*項\s*次\s*$")
+# ISO 6346 貨櫃號碼 (3 碼公司 + U/J/Z + 7 碼數字)，後面常跟著尺寸型號 (45G1 / 22G1 / 45R1)
+_CONTAINER_RE = re.compile(r"\s*\b[A-Z]{3}[UJZ]\d{7}\b(?:\s+\d{2}[A-Z]\d\b)?")
+# 件數 / 嘜頭："91 4CTN N/M"、"45 5CTN"、件數含千分位時 "1,05 1CTN N/M"
+_PACKAGE_MARK_RE = re.compile(r"\s*\b\d[\d,]*\s+\d+\s*(?:CTNS?|PKGS?|PLTS?)\b(?:\s+N/M\b)?")
+
+
+@lru_cache(maxsize=65536)
+def normalize_description(raw):
+    """
+    只去除版面殘留 (連同其前方的空白)，其餘文字不變；同一輸入回傳同一個字串物件，
+    大批報單中重複的品名只佔一份記憶體。範例取自 overpdf 範例檔的解析結果：
+
+    >>> normalize_description("Wire Basket-7.48in x 10.23in x 9.84in-19cm x 26cm x 25cm- Steel 收納籃 "
+    ...                       "91 4CTN N/M --------------------------------------- SNBU8247505 45G1 項 次")
+    'Wire Basket-7.48in x 10.23in x 9.84in-19cm x 26cm x 25cm- Steel 收納籃'
+    >>> normalize_description("CLIP BOARD Paper Steel Polypropylene 板夾【A4】 "
+    ...                       "1,15 1CTN N/M --------------------------------------- TCNU3391075 45G1 項 次")
+    'CLIP BOARD Paper Steel Polypropylene 板夾【A4】'
+    >>> normalize_description("Wicker Pet Bed Body：Willow（Genus：Salix Species：S. integra)Fabric： Polyester,"
+    ...                       "Cotton, Rayon, Spandex 寵物床 --------------- ----------------------- --------------")
+    'Wicker Pet Bed Body：Willow（Genus：Salix Species：S. integra)Fabric： Polyester,Cotton, Rayon, Spandex 寵物床'
+    >>> normalize_description("DIGITAL CLOCK Body： ABS resin 磁吸式溫濕度計時鐘【電池式】 (不含電池)) " + "-" * 98)
+    'DIGITAL CLOCK Body： ABS resin 磁吸式溫濕度計時鐘【電池式】 (不含電池))'
+    """
+    text = " " + (raw or "")
+    text = _SEPARATOR_RE.sub("", text)
+    text = _DASH_RUN_RE.sub(" ", text)
+    text = _CONTAINER_RE.sub("", text)
+    text = _PACKAGE_MARK_RE.sub("", text)
+    text = _HEADER_TAIL_RE.sub("", text)
+    return sys.intern(text.strip())
+
+
+def description_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).digest()
+
+
+def name_search_condition(keyword):
+    """
+    品名表的搜尋條件 (sql, 參數)：以 FULLTEXT 片語比對 (ngram 斷詞，等同子字串比對)，
+    關鍵字短於索引詞長時退回 LIKE。
+    """
+    phrase = keyword.replace('"', " ").strip()
+    if len(phrase) >= FULLTEXT_MIN_CHARS:
+        return "MATCH(description) AGAINST (%s IN BOOLEAN MODE)", f'"{phrase}"'
+    return "description LIKE %s", f"%{keyword}%"
+
+# ==========================================
+# 資料庫
+# ==========================================
+
+_schema_ready = False
+
+
+def has_description_schema(cursor):
+    """ 是否已執行 --migrate (products 有 description_id)；確認存在後同一個 process 不再查詢 """
+    global _schema_ready
+    if not _schema_ready:
+        cursor.execute("""
+            SELECT COUNT(*) AS n FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'products' AND COLUMN_NAME = 'description_id'
+        """)
+        _schema_ready = bool(cursor.fetchone()['n'])
+    return _schema_ready
+
+
+def name_columns(cursor):
+    """
+    查詢品名用的 (欄位運算式, JOIN 子句)：已 --migrate 時品名只在 product_descriptions，
+    否則仍讀 products.name_en。呼叫端以 `{expr} AS name_en` 保持結果欄位名稱不變。
+    """
+    if has_description_schema(cursor):
+        return DISPLAY_NAME_SQL, DESC_JOIN_SQL
+    return "p.name_en", ""
+
+
+def migrate_schema(cursor):
+    """ 建立品名表並在 products 加上 description_id (DDL 會隱含 commit) """
+    global _schema_ready
+    # ngram 搭配預設停用詞表會把含單一字母 (a / s / t ...) 的詞元整個丟掉，建索引前關閉
+    cursor.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+    cursor.execute(DESCRIPTION_DDL)
+    if not has_description_schema(cursor):
+        print("ℹ️ products 新增 description_id 欄位 ...")
+        cursor.execute("""
+            ALTER TABLE products
+                ADD COLUMN description_id INT NULL,
+                ADD KEY idx_products_description (description_id)
+        """)
+        _schema_ready = True
+
+
+def drop_schema(cursor):
+    """ 移除 --migrate 新增的欄位與品名表 (先以 restore_products 寫回品名) """
+    global _schema_ready
+    if has_description_schema(cursor):
+        cursor.execute("""
+            ALTER TABLE products
+                DROP KEY idx_products_description,
+                DROP COLUMN description_id
+        """)
+    cursor.execute("DROP TABLE IF EXISTS product_descriptions")
+    _schema_ready = False
+
+
+class DescriptionStore:
+    """
+    品名去重：同一批匯入中重複的品名只查一次資料庫。
+    intern() 回傳 description_id；空品名回傳 None。
+    """
+
+    def __init__(self, execute=None):
+        # execute(cursor, name, sql, params)：匯入時傳入 metrics.execute 以納入延遲統計
+        self._execute = execute or (lambda cursor, name, sql, params: cursor.execute(sql, params))
+        self._ids = {}
+        self.inserted = 0
+
+    def intern(self, cursor, text):
+        if not text:
+            return None
+        digest = description_hash(text)
+        description_id = self._ids.get(digest)
+        if description_id is not None:
+            return description_id
+
+        # LAST_INSERT_ID(expr)：不論新增或已存在，都由 lastrowid 取回 id，只需一次往返
+        self._execute(cursor, "description_upsert", """
+            INSERT INTO product_descriptions (desc_hash, description)
+            VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE description_id = LAST_INSERT_ID(description_id)
+        """, (digest, text))
+        if cursor.rowcount == 1:
+            self.inserted += 1
+        description_id = cursor.lastrowid
+        self._ids[digest] = description_id
+        return description_id
+
+
+def migrate_products(conn, batch_size=1000):
+    """
+    建立品名表，將 products.name_en 原文登錄到品名表後清空 name_en (品名只保留一份)。
+    原文照搬不做正規化，restore_products 可完整寫回。
+    可重複執行 (只處理 description_id 為 NULL 的產品)，每批 commit 一次。
+    """
+    with conn.cursor() as cursor:
+        migrate_schema(cursor)
+        cursor.execute("""
+            SELECT COUNT(*) AS n, COALESCE(SUM(LENGTH(name_en)), 0) AS bytes
+            FROM products WHERE description_id IS NULL AND name_en <> ''
+        """)
+        before = cursor.fetchone()
+        print(f"🔄 待轉換產品 {before['n']:,} 筆 (品名共 {int(before['bytes']):,} bytes)")
+
+        store = DescriptionStore()
+        done = 0
+        last_id = 0
+        while True:
+            cursor.execute("""
+                SELECT product_id, name_en FROM products
+                WHERE description_id IS NULL AND name_en <> '' AND product_id > %s
+                ORDER BY product_id LIMIT %s
+            """, (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            for r in rows:
+                description_id = store.intern(cursor, r['name_en'])
+                cursor.execute(
+                    "UPDATE products SET description_id = %s, name_en = '' WHERE product_id = %s",
+                    (description_id, r['product_id'])
+                )
+            last_id = rows[-1]['product_id']
+            done += len(rows)
+            conn.commit()
+            print(f"   已轉換 {done:,} / {before['n']:,}", end="\r")
+
+        cursor.execute("""
+            SELECT COUNT(*) AS n,
+                   COALESCE(SUM(LENGTH(description)), 0) AS bytes
+            FROM product_descriptions
+        """)
+        after = cursor.fetchone()
+        print(f"\n✅ 轉換完成: {done:,} 筆產品 -> {after['n']:,} 種品名 "
+              f"({int(after['bytes']):,} bytes，本次新增 {store.inserted:,} 種)")
+    return done
+
+
+def restore_products(conn, batch_size=1000):
+    """ 還原：把品名表的文字寫回 products.name_en 並清除 description_id，每批 commit 一次 """
+    done = 0
+    with conn.cursor() as cursor:
+        if not has_description_schema(cursor):
+            return done
+        while True:
+            cursor.execute("""
+                SELECT p.product_id, pd.description FROM products p
+                JOIN product_descriptions pd ON p.description_id = pd.description_id
+                ORDER BY p.product_id LIMIT %s
+            """, (batch_size,))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            for r in rows:
+                cursor.execute(
+                    "UPDATE products SET name_en = %s, description_id = NULL WHERE product_id = %s",
+                    (r['description'], r['product_id'])
+                )
+            done += len(rows)
+            conn.commit()
+            print(f"   已還原 {done:,} 筆", end="\r")
+    print(f"\n✅ 已寫回 {done:,} 筆產品品名")
+    return done
+
+
+if __name__ == "__main__":
+    import argparse
+
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    ap = argparse.ArgumentParser(description="貨物名稱正規化 / 去重")
+    ap.add_argument("--migrate", action="store_true", help="建立品名表並將 products.name_en 移入品名表")
+    ap.add_argument("--rollback", action="store_true", help="把品名寫回 products.name_en 並移除品名表")
+    ap.add_argument("text", nargs="*", help="測試正規化結果的品名字串")
+    args = ap.parse_args()
+
+    if args.migrate or args.rollback:
+        from database import create_connection, close_connection
+
+        conn = create_connection()
+        if not conn:
+            sys.exit(1)
+        try:
+            if args.rollback:
+                restore_products(conn)
+                with conn.cursor() as cursor:
+                    drop_schema(cursor)
+            else:
+                migrate_products(conn)
+        finally:
+            close_connection(conn)
+    else:
+        for t in args.text:
+            print(normalize_description(t))
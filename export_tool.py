@@ -0,0 +1,247 @@
+import os
+import sys
+import csv
+import time
+import argparse
+from datetime import date, datetime, timedelta
+from database import create_connection, close_connection
+import description
+
+# ==========================================
+# 歷史報單大量匯出 (稽核用)
+# ==========================================
+# 使用 pymysql 的 SSCursor (unbuffered / server-side)：資料邊讀邊寫，
+# 不論區間內有多少筆，記憶體用量都固定在一個 batch 的大小。
+
+EXPORT_BATCH_SIZE = 2000
+XLSX_MAX_ROWS = 1048576  # Excel 單一工作表上限 (含標題列)
+
+# (SELECT 欄位, 匯出標題)
+EXPORT_COLUMNS = [
+    ("d.decl_no", "報單號碼"),
+    ("d.import_date", "進口日期"),
+    ("i.seq_no", "項次"),
+    ("p.barcode", "貨號/條碼"),
+    ("p.name_en", "貨物名稱"),
+    ("i.applied_ccc_code", "稅則號列"),
+    ("i.applied_permit_no", "許可證號碼"),
+    ("p.origin_country", "生產國別"),
+    ("p.risk_note", "申報注意事項"),
+]
+
+_FROM_SQL = """
+    FROM declaration_items i
+    JOIN products p ON i.product_id = p.product_id
+    JOIN declarations d ON i.declaration_id = d.declaration_id
+    {join}
+    WHERE d.import_date >= %s AND d.import_date < %s
+"""
+
+
+def _export_sql(cursor):
+    """ 已 --migrate 時品名只存於 product_descriptions，改以 JOIN 取回 """
+    name, join = description.name_columns(cursor)
+    columns = [name if col == "p.name_en" else col for col, _ in EXPORT_COLUMNS]
+    return (
+        "SELECT " + ", ".join(columns)
+        + _FROM_SQL.format(join=join)
+        + " ORDER BY d.import_date, d.decl_no, i.seq_no"
+    )
+
+
+COUNT_SQL = "SELECT COUNT(*) AS n" + _FROM_SQL.format(join="")
+
+
+def _parse_date(value):
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value.strip(), "%Y-%m-%d").date()
+
+
+def _temp_path(path):
+    """ 與目標檔同目錄的暫存檔：匯出完成才 os.replace 成目標檔，取消 / 失敗時不動到既有檔案 """
+    return f"{path}.{os.getpid()}.tmp"
+
+
+class _CsvSink:
+    def __init__(self, path):
+        self.path = path
+        self.f = open(_temp_path(path), 'w', encoding='utf-8-sig', newline='')
+        self.writer = csv.writer(self.f)
+        self.writer.writerow([title for _, title in EXPORT_COLUMNS])
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.f.close()
+        os.replace(self.f.name, self.path)
+
+    def discard(self):
+        """ 取消 / 失敗時：關檔並刪除寫到一半的暫存檔 (目標檔保持原狀) """
+        self.f.close()
+        os.remove(self.f.name)
+
+
+class _XlsxSink:
+    """ openpyxl write-only 模式：逐列寫出，不在記憶體保留整張表；超過上限自動換工作表 """
+
+    def __init__(self, path):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise RuntimeError("匯出 XLSX 需要 openpyxl 套件 (pip install openpyxl)")
+        self.path = path
+        self.wb = Workbook(write_only=True)
+        self.sheet_no = 0
+        self._new_sheet()
+
+    def _new_sheet(self):
+        self.sheet_no += 1
+        self.ws = self.wb.create_sheet(title=f"報單明細{self.sheet_no}")
+        self.ws.append([title for _, title in EXPORT_COLUMNS])
+        self.sheet_rows = 1
+
+    def write_rows(self, rows):
+        for row in rows:
+            if self.sheet_rows >= XLSX_MAX_ROWS:
+                self._new_sheet()
+            self.ws.append(list(row))
+            self.sheet_rows += 1
+
+    def close(self):
+        tmp_path = _temp_path(self.path)
+        try:
+            self.wb.save(tmp_path)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def discard(self):
+        # 尚未 save，目標檔案與暫存檔都未被寫入；結束各工作表的串流 (暫存檔由 openpyxl 於程式結束時清除)
+        for ws in self.wb.worksheets:
+            ws.close()
+
+
+def _abort_connection(conn):
+    """
+    中途停止串流：SSCursor.close() 會把剩下的結果全部讀完才返回，
+    因此直接關閉連線，伺服器端隨即停止傳送。
+    """
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+def export_history(start_date, end_date, output_path, progress_callback=None, cancel_event=None):
+    """
+    匯出 [start_date, end_date] (含兩端) 區間內的全部報單明細。
+    output_path 副檔名決定格式 (.csv / .xlsx)。
+    progress_callback(rows_done, total_rows, rows_per_sec) 每個 batch 呼叫一次。
+    回傳匯出筆數；失敗或取消時回傳 None，並刪除未完成的檔案。
+    """
+    import pymysql
+
+    try:
+        start = _parse_date(start_date)
+        end_exclusive = _parse_date(end_date) + timedelta(days=1)
+    except (ValueError, AttributeError):
+        print(f"❌ 日期格式錯誤: {start_date} ~ {end_date} (請使用 YYYY-MM-DD)")
+        return None
+    if end_exclusive <= start:
+        print(f"❌ 結束日期 {end_date} 早於起始日期 {start_date}")
+        return None
+    ext = os.path.splitext(output_path)[1].lower()
+    if ext not in (".csv", ".xlsx"):
+        print(f"❌ 不支援的匯出格式: {ext} (僅支援 .csv / .xlsx)")
+        return None
+
+    conn = create_connection()
+    if not conn:
+        return None
+
+    sink = None
+    rows_done = 0
+    try:
+        # 1. 先算總筆數 (一般 cursor)，供進度顯示
+        with conn.cursor() as cursor:
+            cursor.execute(COUNT_SQL, (start, end_exclusive))
+            total_rows = int(cursor.fetchone()['n'])
+            export_sql = _export_sql(cursor)
+            # 寫檔較慢時避免伺服器端因等待 client 讀取而斷線
+            cursor.execute("SET SESSION net_write_timeout = 600")
+
+        print(f"📤 匯出 {start} ~ {end_exclusive - timedelta(days=1)}，共 {total_rows:,} 筆 -> {output_path}")
+        sink = _XlsxSink(output_path) if ext == ".xlsx" else _CsvSink(output_path)
+
+        # 2. server-side cursor 串流讀取
+        t0 = time.perf_counter()
+        cursor = conn.cursor(pymysql.cursors.SSCursor)
+        cancelled = False
+        try:
+            cursor.execute(export_sql, (start, end_exclusive))
+            while True:
+                rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                sink.write_rows(rows)
+                rows_done += len(rows)
+
+                elapsed = time.perf_counter() - t0
+                rate = rows_done / elapsed if elapsed > 0 else 0.0
+                if progress_callback:
+                    progress_callback(rows_done, total_rows, rate)
+
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelled = True
+                    break
+        except BaseException:
+            _abort_connection(conn)
+            raise
+
+        if cancelled:
+            _abort_connection(conn)
+            print(f"\n⚠️ 使用者取消匯出 (已讀取 {rows_done:,} 筆)，已捨棄未完成的檔案")
+            return None
+
+        # unbuffered cursor 必須讀完或關閉後連線才能再使用 (此時結果已全部讀完)
+        cursor.close()
+        sink.close()
+        sink = None
+        elapsed = time.perf_counter() - t0
+        print(f"\n✅ 匯出完成: {rows_done:,} 筆，耗時 {elapsed:.1f} 秒 "
+              f"({rows_done / elapsed if elapsed > 0 else 0:,.0f} 筆/秒)")
+        return rows_done
+
+    except Exception as e:
+        print(f"\n❌ 匯出過程中發生錯誤: {e}")
+        return None
+    finally:
+        if sink is not None:
+            try:
+                sink.discard()
+            except Exception as e:
+                print(f"⚠️ 無法刪除未完成的檔案 {output_path}: {e}")
+        close_connection(conn)
+
+
+def _print_progress(rows_done, total_rows, rate):
+    pct = f"{100 * rows_done / total_rows:5.1f}%" if total_rows else "  -  "
+    print(f"   {pct}  {rows_done:,}/{total_rows:,} 筆  {rate:,.0f} 筆/秒", end="\r")
+
+
+if __name__ == "__main__":
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    ap = argparse.ArgumentParser(description="匯出指定進口日期區間的全部報單明細 (CSV / XLSX)")
+    ap.add_argument("start", help="起始日期 YYYY-MM-DD")
+    ap.add_argument("end", help="結束日期 YYYY-MM-DD (含)")
+    ap.add_argument("-o", "--output", help="輸出檔名 (.csv 或 .xlsx，預設 CSV)")
+    args = ap.parse_args()
+
+    output = args.output or f"Export_{args.start}_{args.end}.csv"
+    result = export_history(args.start, args.end, output, progress_callback=_print_progress)
+    sys.exit(0 if result is not None else 1)
@@ -1,20 +1,89 @@
 import csv
+import io
 import os
 import sys
-import tkinter as tk
-from tkinter import filedialog, messagebox
+import codecs
 from database import create_connection, close_connection
+import description
+import summary
+import validator
+from metrics import ImportMetrics
+
+# 匯入效能報告 (每次匯入覆寫)；設定 IMPORT_METRICS_PROM 時另外輸出 Prometheus textfile
+IMPORT_METRICS_JSON = os.getenv("IMPORT_METRICS_JSON", "import_metrics.json")
+IMPORT_METRICS_PROM = os.getenv("IMPORT_METRICS_PROM", "")
 
 # 設定標準輸出編碼，避免 Windows 終端機亂碼
 sys.stdout.reconfigure(encoding='utf-8')
 
-def import_csv_to_db(csv_filename):
+# utf-8-sig 需排在最前：BOM 否則會留在第一個欄位名稱 (報單號碼) 上；沒有 BOM 的 UTF-8 檔以 utf-8-sig 讀取結果相同。
+# 繁中 Windows 的 Excel 另存 CSV / 文字檔為 cp950 (Big5 的 Microsoft 擴充)；「Unicode 文字」則為含 BOM 的 UTF-16。
+CSV_ENCODINGS = ['utf-8-sig', 'cp950', 'big5']
+CSV_DELIMITERS = [',', '\t', ';']
+
+def decode_csv(csv_filename):
+    """
+    以整個檔案內容偵測編碼 (只試讀第一行時，Big5 檔可能在後面才解碼失敗)，
+    並依表頭列判斷分隔符號 (Excel 另存的文字檔為 Tab 分隔)。
+    回傳 (文字串流, 編碼, 分隔符號)；無法辨識編碼時回傳 (None, None, None)。
+    """
+    with open(csv_filename, 'rb') as f:
+        raw = f.read()
+    encodings = ['utf-16'] if raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)) else CSV_ENCODINGS
+    for enc in encodings:
+        try:
+            text = raw.decode(enc)
+        except UnicodeDecodeError:
+            continue
+        header = text.split('\n', 1)[0]
+        delimiter = max(CSV_DELIMITERS, key=header.count)
+        return io.StringIO(text, newline=''), enc, delimiter
+    return None, None, None
+
+def load_existing_items(cursor, decl_nos):
+    """
+    讀出這些報單目前在資料庫中的明細，供比對「內容未變」的列。
+    只比對 declaration_items 本身的欄位 (品名、產地等屬於各報單共用的 products，不在此比對)。
+    回傳 {(報單號碼, 項次): (條碼, 稅則, 許可證)}
+    """
+    decl_nos = sorted(d for d in decl_nos if d)
+    if not decl_nos:
+        return {}
+    placeholders = ", ".join(["%s"] * len(decl_nos))
+    cursor.execute(f"""
+        SELECT d.decl_no, i.seq_no, p.barcode, i.applied_ccc_code, i.applied_permit_no
+        FROM declaration_items i
+        JOIN declarations d ON i.declaration_id = d.declaration_id
+        JOIN products p ON i.product_id = p.product_id
+        WHERE d.decl_no IN ({placeholders})
+    """, decl_nos)
+    return {
+        (r['decl_no'], str(r['seq_no'])): (
+            r['barcode'] or '', r['applied_ccc_code'] or '', r['applied_permit_no'] or '',
+        )
+        for r in cursor.fetchall()
+    }
+
+def load_product_origins(cursor, barcodes, batch_size=1000):
+    """ 讀出這些條碼目前的生產國別 {條碼: 產地}，供偵測產地變更 (統計表需重算舊報單) """
+    barcodes = sorted(b for b in barcodes if b)
+    origins = {}
+    for start in range(0, len(barcodes), batch_size):
+        chunk = barcodes[start:start + batch_size]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        cursor.execute(f"SELECT barcode, origin_country FROM products WHERE barcode IN ({placeholders})", chunk)
+        origins.update((r['barcode'], r['origin_country'] or '') for r in cursor.fetchall())
+    return origins
+
+def import_csv_to_db(csv_filename, skip_invalid=False, metrics_json=IMPORT_METRICS_JSON, metrics_prom=IMPORT_METRICS_PROM):
     # 1. 檢查檔案是否存在
     if not os.path.exists(csv_filename):
         print(f"❌ 錯誤: 找不到檔案 '{csv_filename}'")
         return 0, None
 
-    conn = create_connection()
+    metrics = ImportMetrics(source=os.path.basename(csv_filename))
+    with metrics.phase("connect"):
+        conn = create_connection()
     if not conn:
         return 0, None
 
@@ -22,41 +91,76 @@ def import_csv_to_db(csv_filename):
         cursor = conn.cursor()
         print(f"🚀 開始匯入 '{csv_filename}' ...")
 
-        # 2. 自動偵測編碼 (UTF-8, UTF-8-sig, Big5)
-        encodings = ['utf-8', 'utf-8-sig', 'utf-16', 'big5']
-        decoded_file = None
-        
-        for enc in encodings:
-            try:
-                f = open(csv_filename, mode='r', encoding=enc, newline='')
-                f.readline() # 試讀一行
-                f.seek(0)    # 回到開頭
-                decoded_file = f
-                print(f"ℹ️ 偵測到檔案編碼: {enc}")
-                break
-            except UnicodeDecodeError:
-                f.close()
-                continue
-        
+        # 歷史統計彙總表 (DDL 需在寫入資料前執行)
+        with metrics.phase("ensure_tables"):
+            summary.ensure_summary_tables(cursor)
+            # 品名只存於品名表 (由 `python description.py --migrate` 建立，匯入不做這項 DDL)
+            has_descriptions = description.has_description_schema(cursor)
+        if not has_descriptions:
+            print("❌ 錯誤: 尚未建立品名表，請先執行 python description.py --migrate")
+            return 0, None
+
+        # 2. 自動偵測編碼 (UTF-8, UTF-16, Big5) 與分隔符號 (逗號 / Tab)
+        decoded_file, enc, delimiter = decode_csv(csv_filename)
         if not decoded_file:
             print("❌ 錯誤: 無法識別檔案編碼。")
             return 0, None
+        print(f"ℹ️ 偵測到檔案編碼: {enc}，分隔符號: {delimiter!r}")
 
         # 3. 開始讀取與寫入資料庫
         with decoded_file as csvfile:
-            reader = csv.DictReader(csvfile)
+            rows = list(csv.DictReader(csvfile, delimiter=delimiter))
+
+            # 匯入前檢查：格式錯誤 + 與歷史 / 批次內申報不一致
+            with metrics.phase("validate"):
+                history_index = validator.build_history_index(conn)
+                issues, error_rows = validator.validate_rows(rows, history_index)
+            validator.print_summary(issues, len(rows))
+            if issues:
+                validator.write_issue_report(issues, validator.report_path_for(csv_filename))
+            # 檢查只負責標示問題；預設照常匯入，skip_invalid=True (--skip-invalid) 才略過格式錯誤的列
+            if error_rows:
+                if skip_invalid:
+                    print(f"⚠️ 略過 {len(error_rows)} 列格式錯誤的資料")
+                else:
+                    print(f"⚠️ {len(error_rows)} 列格式錯誤仍會匯入，請依檢查報告修正 (--skip-invalid 可略過)")
             
+            # 更正報單通常只改了幾個項次：明細內容與資料庫相同的列不再寫入報單 / 明細 (產品主檔仍照常更新)
+            with metrics.phase("load_existing"):
+                existing_items = load_existing_items(cursor, {(r.get('報單號碼') or '').strip() for r in rows})
+                product_origins = load_product_origins(cursor, {(r.get('貨號/條碼') or '').strip() for r in rows})
+
             count_new_prod = 0
             count_update_prod = 0
             count_items = 0
+            count_unchanged = 0
+            descriptions = description.DescriptionStore(metrics.execute)
+            # 品名只寫 description_id；name_en 保留為空字串 (舊資料已由 --migrate 移入品名表)
+            sql_prod = """
+                INSERT INTO products (barcode, name_en, description_id, default_ccc_code, default_permit_code, risk_note, origin_country)
+                VALUES (%s, '', %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    name_en = '',
+                    description_id = VALUES(description_id),
+                    default_ccc_code = VALUES(default_ccc_code),
+                    default_permit_code = VALUES(default_permit_code),
+                    risk_note = VALUES(risk_note),
+                    origin_country = VALUES(origin_country);
+            """
             decl_no_set = set() # 用集合來儲存不重複的報單號碼
+            touched_decl_ids = set() # 本次有異動的報單 (供統計表增量更新)
+            origin_changed_products = set() # 生產國別被改掉的產品 (用到它的舊報單統計也要重算)
+
+            for row_no, row in enumerate(rows, start=1):
+                if skip_invalid and row_no in error_rows:
+                    continue
 
-            for row in reader:
                 # --- 欄位對應 (Mapping) ---
                 decl_no = row.get('報單號碼', '').strip()
                 seq_no = row.get('項次', '0').strip()
                 barcode = row.get('貨號/條碼', '').strip()
-                name_en = row.get('貨物名稱', '').strip()
+                # 去除版面殘留後的完整品名 (品名表中每種品名只存一次)
+                name_en = description.normalize_description(row.get('貨物名稱', '').strip())
                 ccc_code = row.get('稅則號列', '').strip()
                 permit = row.get('許可證號碼', '').strip()
                 note = row.get('申報注意事項', '').strip()
@@ -72,18 +176,10 @@ def import_csv_to_db(csv_filename):
 
                 # ---------------------------------------------------------
                 # A. 處理產品主檔 (Products) - 加入 origin_country
+                #    品名存於品名表，產品只記 description_id
                 # ---------------------------------------------------------
-                sql_prod = """
-                    INSERT INTO products (barcode, name_en, default_ccc_code, default_permit_code, risk_note, origin_country)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    ON DUPLICATE KEY UPDATE
-                        name_en = VALUES(name_en),
-                        default_ccc_code = VALUES(default_ccc_code),
-                        default_permit_code = VALUES(default_permit_code),
-                        risk_note = VALUES(risk_note),
-                        origin_country = VALUES(origin_country);
-                """
-                cursor.execute(sql_prod, (barcode, name_en, ccc_code, permit, note, origin_country))
+                params = (barcode, descriptions.intern(cursor, name_en), ccc_code, permit, note, origin_country)
+                metrics.execute(cursor, "product_upsert", sql_prod, params)
                 
                 if cursor.rowcount == 1:
                     count_new_prod += 1
@@ -91,19 +187,27 @@ def import_csv_to_db(csv_filename):
                     count_update_prod += 1
 
                 # 取得 product_id
-                cursor.execute("SELECT product_id FROM products WHERE barcode = %s", (barcode,))
+                metrics.execute(cursor, "product_id_lookup", "SELECT product_id FROM products WHERE barcode = %s", (barcode,))
                 prod_row = cursor.fetchone()
                 if not prod_row:
                     continue
                 product_id = prod_row['product_id']
+                if barcode in product_origins and product_origins[barcode] != origin_country:
+                    origin_changed_products.add(product_id)
+                product_origins[barcode] = origin_country
+
+                # 產品主檔照舊每列 upsert (後匯入者為準)；明細內容與資料庫相同時不再寫入報單 / 明細
+                if existing_items.get((decl_no, seq_no)) == (barcode, ccc_code, permit):
+                    count_unchanged += 1
+                    continue
 
                 # ---------------------------------------------------------
                 # B. 處理報單主檔 (Declarations)
                 # ---------------------------------------------------------
                 sql_decl = "INSERT IGNORE INTO declarations (decl_no, status) VALUES (%s, '已放行')"
-                cursor.execute(sql_decl, (decl_no,))
+                metrics.execute(cursor, "decl_insert", sql_decl, (decl_no,))
                 
-                cursor.execute("SELECT declaration_id FROM declarations WHERE decl_no = %s", (decl_no,))
+                metrics.execute(cursor, "decl_id_lookup", "SELECT declaration_id FROM declarations WHERE decl_no = %s", (decl_no,))
                 result_decl = cursor.fetchone()
                 if result_decl:
                     declaration_id = result_decl['declaration_id']
@@ -114,7 +218,7 @@ def import_csv_to_db(csv_filename):
                 # C. 處理報單明細 (Declaration_Items)
                 # ---------------------------------------------------------
                 check_sql = "SELECT item_id FROM declaration_items WHERE declaration_id=%s AND seq_no=%s"
-                cursor.execute(check_sql, (declaration_id, seq_no))
+                metrics.execute(cursor, "item_exists_check", check_sql, (declaration_id, seq_no))
                 if cursor.fetchone():
                     # 若已存在則更新
                     update_item_sql = """
@@ -122,7 +226,7 @@ def import_csv_to_db(csv_filename):
                         SET product_id=%s, applied_ccc_code=%s, applied_permit_no=%s
                         WHERE declaration_id=%s AND seq_no=%s
                     """
-                    cursor.execute(update_item_sql, (product_id, ccc_code, permit, declaration_id, seq_no))
+                    metrics.execute(cursor, "item_update", update_item_sql, (product_id, ccc_code, permit, declaration_id, seq_no))
                 else:
                     # 不存在則新增
                     sql_item = """
@@ -130,17 +234,28 @@ def import_csv_to_db(csv_filename):
                         (declaration_id, product_id, seq_no, applied_ccc_code, applied_permit_no)
                         VALUES (%s, %s, %s, %s, %s)
                     """
-                    cursor.execute(sql_item, (declaration_id, product_id, seq_no, ccc_code, permit))
+                    metrics.execute(cursor, "item_insert", sql_item, (declaration_id, product_id, seq_no, ccc_code, permit))
                 
                 count_items += 1
+                touched_decl_ids.add(declaration_id)
+                metrics.row_done()
+
+            # 只重算本次異動報單的統計資料，與明細在同一個 transaction
+            with metrics.phase("summary_refresh"):
+                if origin_changed_products:
+                    touched_decl_ids |= summary.declarations_using_products(cursor, origin_changed_products)
+                summary.refresh_declarations(cursor, touched_decl_ids)
 
             # 全部完成後提交 (Commit)
-            conn.commit()
+            with metrics.phase("commit"):
+                conn.commit()
             
             print("-" * 30)
             print("✅ 匯入完成！統計結果：")
             print(f"   📦 產品資料處理: {count_new_prod + count_update_prod} 筆")
             print(f"   📝 報單明細處理: {count_items} 筆")
+            print(f"   🏷️ 新增品名: {descriptions.inserted} 種")
+            print(f"   ♻️ 內容未變略過: {count_unchanged} 筆")
             print("-" * 30)
             
             # 回傳匯入筆數與報單號碼列表，供視窗顯示用
@@ -152,11 +267,24 @@ def import_csv_to_db(csv_filename):
         return 0, None
     finally:
         close_connection(conn)
+        # 失敗時也輸出，方便找出卡在哪一句 SQL
+        metrics.print_summary()
+        try:
+            if metrics_json:
+                metrics.write_json(metrics_json)
+            if metrics_prom:
+                metrics.write_prometheus(metrics_prom)
+        except OSError as e:
+            print(f"⚠️ 無法寫入效能報告: {e}")
 
 def select_file_and_import():
     """
     建立隱藏的主視窗，並開啟檔案選擇對話框
     """
+    # tkinter 只在需要開啟對話框時才載入 (純 CLI 匯入不需要)
+    import tkinter as tk
+    from tkinter import filedialog, messagebox
+
     # 建立主視窗但隱藏 (不顯示空白視窗)
     root = tk.Tk()
     root.withdraw()
@@ -185,4 +313,17 @@ def select_file_and_import():
         print("使用者取消選擇檔案。")
 
 if __name__ == "__main__":
-    select_file_and_import()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        # 命令列模式: python import_tool.py 檔案.csv [--skip-invalid] [--metrics-json 路徑] [--prom 路徑]
+        import argparse
+        ap = argparse.ArgumentParser(description="匯入報單 CSV 至資料庫")
+        ap.add_argument("csv", help="要匯入的 CSV 檔案")
+        ap.add_argument("--skip-invalid", action="store_true", help="略過格式錯誤的列 (預設只標示於檢查報告)")
+        ap.add_argument("--metrics-json", default=IMPORT_METRICS_JSON, help="效能報告 JSON 路徑")
+        ap.add_argument("--prom", default=IMPORT_METRICS_PROM, help="Prometheus textfile 輸出路徑")
+        args = ap.parse_args()
+        count, decl_nos = import_csv_to_db(args.csv, skip_invalid=args.skip_invalid,
+                                           metrics_json=args.metrics_json, metrics_prom=args.prom)
+        sys.exit(0 if decl_nos is not None else 1)
+    else:
+        select_file_and_import()
\ No newline at end of file
@@ -0,0 +1,217 @@
+import os
+import json
+import hashlib
+
+# ==========================================
+# 報單版面設定檔 (Layout Profiles)
+# ==========================================
+# parser 依欄位 X 座標切分「項次 / 貨物名稱 / 稅則號列 / 雜訊區」。
+# 版面位移時不再手動改常數，而是：
+#   1. 由第一頁表頭文字的位置算出一組邊界 (calibrate)
+#   2. 依表頭位置產生指紋 (fingerprint)，對應到最接近的已命名設定檔
+#   3. 指紋 -> 設定檔名稱 快取，下次同版面直接命中
+# 一般解析不寫入任何檔案：偵測結果只記在本次執行的記憶體中，未知版面以校正值解析；
+# 設定檔與指紋快取只由 python xy.py <pdf> --calibrate --save 寫入。
+
+LAYOUT_PROFILE_FILE = "layout_profiles.json"  # 使用者校正後儲存的設定檔
+LAYOUT_CACHE_FILE = "layout_cache.json"       # 指紋 -> 設定檔名稱 快取
+
+# 校正後的邊界與既有設定檔相差在此範圍內 (pt) 即視為同一版面
+PROFILE_MATCH_TOLERANCE = 4.0
+
+
+class LayoutProfile:
+    """ 一組欄位邊界 (單位: PDF pt，以頁面左緣為 0) """
+    # desc_min_x: 貨物名稱欄左界 / split_ccc: 貨物名稱與稅則欄分界 / noise_start: 其後為金額等雜訊區
+    __slots__ = ("name", "desc_min_x", "split_ccc", "noise_start")
+
+    BOUNDARY_FIELDS = ("desc_min_x", "split_ccc", "noise_start")
+
+    def __init__(self, name, desc_min_x, split_ccc, noise_start):
+        self.name = name
+        self.desc_min_x = desc_min_x
+        self.split_ccc = split_ccc
+        self.noise_start = noise_start
+
+    def to_dict(self):
+        return {f: getattr(self, f) for f in self.BOUNDARY_FIELDS}
+
+    @classmethod
+    def from_dict(cls, name, data):
+        return cls(name, **{f: float(data[f]) for f in cls.BOUNDARY_FIELDS})
+
+    def distance(self, other):
+        """ 兩組邊界的最大差距 (pt) """
+        return max(abs(getattr(self, f) - getattr(other, f)) for f in self.BOUNDARY_FIELDS)
+
+    def __repr__(self):
+        bounds = ", ".join(f"{f}={getattr(self, f):g}" for f in self.BOUNDARY_FIELDS)
+        return f"LayoutProfile({self.name!r}, {bounds})"
+
+
+# V12.0 調校值 (原 parser.COORD_* 常數)
+DEFAULT_PROFILE = LayoutProfile(
+    "v12",
+    desc_min_x=10,
+    split_ccc=202,
+    noise_start=315,
+)
+
+BUILTIN_PROFILES = {DEFAULT_PROFILE.name: DEFAULT_PROFILE}
+
+# 表頭錨點：(邊界欄位, 表頭關鍵字, V12 版面中該關鍵字的 x0)
+# 校正時以「新版面 x0 - V12 x0」的位移量平移對應的 V12 邊界。
+HEADER_ANCHORS = [
+    ("desc_min_x", "貨物名稱", 49.8),
+    ("split_ccc", "輸出入貨品分類號列", 201.2),
+    ("noise_start", "條件、幣別", 327.2),
+]
+REFERENCE_PAGE_WIDTH = 595.32
+
+# ==========================================
+# 設定檔與快取存取
+# ==========================================
+
+_profiles = None
+_cache = None
+_detected = {}  # 指紋 -> 本次執行中偵測到的設定檔 (不寫入檔案)
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 無法讀取 {path}，將忽略: {e}")
+        return {}
+
+
+def _write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_profiles():
+    """ 內建設定檔 + layout_profiles.json 中的校正設定檔 """
+    global _profiles
+    if _profiles is None:
+        _profiles = dict(BUILTIN_PROFILES)
+        for name, data in _read_json(LAYOUT_PROFILE_FILE).items():
+            try:
+                _profiles[name] = LayoutProfile.from_dict(name, data)
+            except (KeyError, TypeError, ValueError):
+                print(f"⚠️ 設定檔格式錯誤，已略過: {name}")
+    return _profiles
+
+
+def save_profile(profile):
+    profiles = load_profiles()
+    profiles[profile.name] = profile
+    custom = {
+        name: p.to_dict() for name, p in profiles.items()
+        if name not in BUILTIN_PROFILES
+    }
+    _write_json(LAYOUT_PROFILE_FILE, custom)
+
+
+def _load_cache():
+    global _cache
+    if _cache is None:
+        _cache = _read_json(LAYOUT_CACHE_FILE)
+    return _cache
+
+
+def remember_fingerprint(fingerprint, profile_name):
+    """ 記錄指紋對應的設定檔 (只由 xy.py --calibrate --save 呼叫) """
+    cache = _load_cache()
+    if cache.get(fingerprint) == profile_name:
+        return
+    cache[fingerprint] = profile_name
+    try:
+        _write_json(LAYOUT_CACHE_FILE, cache)
+    except OSError as e:
+        print(f"⚠️ 無法寫入版面快取: {e}")
+
+# ==========================================
+# 校正與偵測
+# ==========================================
+
+def find_header_positions(words):
+    """ 從第一頁 words 找出各表頭關鍵字的 x0 (找不到者不列入) """
+    positions = {}
+    keywords = {kw for _, kw, _ in HEADER_ANCHORS}
+    for w in words:
+        clean_t = w['text'].replace(" ", "")
+        for kw in keywords:
+            if kw in clean_t and kw not in positions:
+                positions[kw] = float(w['x0'])
+    return positions
+
+
+def page_fingerprint(page_width, page_height, header_positions):
+    """ 以頁面尺寸與表頭位置 (取整數) 組成便宜的版面指紋 """
+    parts = [f"{round(float(page_width))}x{round(float(page_height))}"]
+    for kw in sorted(header_positions):
+        parts.append(f"{kw}@{round(header_positions[kw])}")
+    return hashlib.sha1("|".join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def calibrate(header_positions, page_width=REFERENCE_PAGE_WIDTH, name="calibrated"):
+    """
+    由表頭位置推算欄位邊界。
+    缺少的錨點沿用 V12 值 (依頁寬等比縮放)；全部缺少時回傳 None。
+    """
+    if not any(kw in header_positions for _, kw, _ in HEADER_ANCHORS):
+        return None
+
+    scale = float(page_width) / REFERENCE_PAGE_WIDTH
+    bounds = {f: getattr(DEFAULT_PROFILE, f) * scale for f in LayoutProfile.BOUNDARY_FIELDS}
+    for field, kw, ref_x in HEADER_ANCHORS:
+        if kw in header_positions:
+            shift = header_positions[kw] - ref_x * scale
+            bounds[field] = round(getattr(DEFAULT_PROFILE, field) * scale + shift, 1)
+
+    return LayoutProfile(name, **bounds)
+
+
+def calibrate_page(page):
+    """ 對 pdfplumber page 執行校正 (供 xy.py 的校正指令使用) """
+    words = page.extract_words(keep_blank_chars=True)
+    positions = find_header_positions(words)
+    return calibrate(positions, page.width), positions
+
+
+def detect_profile(page_width, page_height, first_page_words):
+    """
+    依第一頁 words 選出版面設定檔：
+      指紋命中快取 (或本次執行已偵測過) -> 直接使用
+      否則校正並挑最接近的已命名設定檔；都不夠接近時使用校正值
+    結果只記在記憶體中，不寫入設定檔或快取檔。
+    """
+    positions = find_header_positions(first_page_words)
+    if not positions:
+        # 沒有表頭文字 (例如掃描檔)，沿用預設值，不寫入快取
+        return DEFAULT_PROFILE
+
+    profiles = load_profiles()
+    fingerprint = page_fingerprint(page_width, page_height, positions)
+    cached_name = _load_cache().get(fingerprint)
+    if cached_name in profiles:
+        return profiles[cached_name]
+    if fingerprint in _detected:
+        return _detected[fingerprint]
+
+    measured = calibrate(positions, page_width)
+    best = min(profiles.values(), key=measured.distance)
+    if measured.distance(best) > PROFILE_MATCH_TOLERANCE:
+        measured.name = f"auto-{fingerprint[:8]}"
+        print(f"📐 偵測到新版面，本次以校正值解析: {measured}")
+        print("   如需保存，請執行: python xy.py <PDF> --calibrate --save")
+        best = measured
+
+    _detected[fingerprint] = best
+    return best
@@ -0,0 +1,284 @@
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import OrderedDict
+from database import ConnectionPool
+from search import lookup_barcodes, search_items
+
+# ==========================================
+# 無介面查詢服務 (CLI / 本機 HTTP)
+# ==========================================
+# 給倉儲掃描站、其他程式查詢條碼的申報資料，不需開 GUI：
+#   python lookup_service.py lookup 4710088412345 ...     # 單次查詢
+#   python lookup_service.py batch < barcodes.txt         # 每行一個條碼，輸出 JSON lines
+#   python lookup_service.py serve --port 8765            # 常駐 HTTP 服務
+#     GET  /lookup?barcode=4710088412345[&barcode=...]
+#     POST /lookup   body: ["4710088412345", ...]
+#     GET  /search?q=關鍵字
+#     GET  /health
+# 查詢邏輯與 GUI 主頁共用 search.py；連線由 ConnectionPool 重複使用，
+# 熱門條碼另有記憶體快取 (LRU + TTL)，掃描站重複刷同一商品時不必每次往返資料庫。
+
+DEFAULT_PORT = 8765
+POOL_SIZE = 4
+CACHE_SIZE = 5000
+CACHE_TTL_SEC = 300  # 匯入新報單後最多 5 分鐘反映到查詢結果
+MAX_BATCH = 500      # 單次請求最多查詢的條碼數
+
+
+class _HotCache:
+    """ 執行緒安全的 LRU + TTL 快取 """
+
+    def __init__(self, max_size=CACHE_SIZE, ttl=CACHE_TTL_SEC):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (到期時間, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            size = len(self._data)
+        total = self.hits + self.misses
+        return {
+            'size': size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+class LookupService:
+    def __init__(self, pool=None, cache_size=CACHE_SIZE, cache_ttl=CACHE_TTL_SEC):
+        self.pool = pool or ConnectionPool(POOL_SIZE)
+        self.cache = _HotCache(cache_size, cache_ttl)
+
+    def lookup_many(self, barcodes):
+        """ 回傳 [結果, ...] (與輸入順序相同)；只有快取未命中的條碼才查資料庫 """
+        barcodes = [str(b).strip() for b in barcodes if str(b).strip()]
+        results = {}
+        missing = []
+        for b in dict.fromkeys(barcodes):
+            hit = self.cache.get(b)
+            if hit is None:
+                missing.append(b)
+            else:
+                results[b] = hit
+
+        if missing:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cursor:
+                    fetched = lookup_barcodes(cursor, missing)
+            for b, result in fetched.items():
+                self.cache.put(b, result)
+                results[b] = result
+
+        return [results[b] for b in barcodes]
+
+    def lookup(self, barcode):
+        found = self.lookup_many([barcode])
+        return found[0] if found else None
+
+    def search(self, keyword):
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                rows = search_items(cursor, keyword)
+        return [
+            {
+                'decl_no': r['decl_no'],
+                'import_date': str(r['import_date']) if r['import_date'] else "",
+                'barcode': r['barcode'],
+                'name': r['name_en'],
+                'ccc': r['applied_ccc_code'],
+                'permit': r['applied_permit_no'] or "",
+                'sop': r['risk_note'] or "",
+            }
+            for r in rows
+        ]
+
+    def close(self):
+        self.pool.close_all()
+
+# ==========================================
+# HTTP 服務
+# ==========================================
+
+def make_handler(service):
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import urlparse, parse_qs
+
+    class LookupHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive，掃描站連續查詢不必每次重新握手
+        # 標頭與內容分兩次送出時，Nagle + delayed ACK 會讓每個回應固定多等約 40ms
+        disable_nagle_algorithm = True
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _run(self, func, *args):
+            try:
+                self._send_json(200, func(*args))
+            except Exception as e:
+                self._send_json(503, {'error': f"查詢失敗: {e}"})
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path == "/health":
+                self._send_json(200, {'status': 'ok', 'cache': service.cache.stats()})
+            elif url.path == "/lookup":
+                barcodes = query.get('barcode', [])
+                if not barcodes:
+                    self._send_json(400, {'error': "缺少 barcode 參數"})
+                elif len(barcodes) > MAX_BATCH:
+                    self._send_json(400, {'error': f"單次最多查詢 {MAX_BATCH} 個條碼"})
+                else:
+                    self._run(service.lookup_many, barcodes)
+            elif url.path == "/search":
+                keyword = query.get('q', [""])[0].strip()
+                if not keyword:
+                    self._send_json(400, {'error': "缺少 q 參數"})
+                else:
+                    self._run(service.search, keyword)
+            else:
+                self._send_json(404, {'error': "not found"})
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/lookup":
+                self._send_json(404, {'error': "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                barcodes = json.loads(self.rfile.read(length) or b"[]")
+            except ValueError:
+                self._send_json(400, {'error': "請傳入 JSON 條碼陣列"})
+                return
+            if not isinstance(barcodes, list):
+                self._send_json(400, {'error': "請傳入 JSON 條碼陣列"})
+            elif len(barcodes) > MAX_BATCH:
+                self._send_json(400, {'error': f"單次最多查詢 {MAX_BATCH} 個條碼"})
+            else:
+                self._run(service.lookup_many, barcodes)
+
+        def log_message(self, format, *args):
+            pass  # 高頻查詢時不逐筆印 access log
+
+    return LookupHandler
+
+
+def make_server(service, host="127.0.0.1", port=DEFAULT_PORT):
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    return server
+
+
+def serve(host, port, pool_size):
+    service = LookupService(ConnectionPool(pool_size))
+    server = make_server(service, host, port)
+    print(f"🚀 查詢服務已啟動: http://{host}:{server.server_address[1]}  (連線池 {pool_size}，Ctrl+C 結束)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 服務已停止")
+    finally:
+        server.server_close()
+        service.close()
+
+# ==========================================
+# CLI
+# ==========================================
+
+def _print_result(result):
+    if not result['found']:
+        print(f"❌ {result['barcode']}: 查無資料")
+        return
+    print(f"✅ {result['barcode']}  {result['name']}")
+    print(f"   稅則 {result['ccc']}  許可證 {result['permit'] or '-'}  最近報單 {result['decl_no']}")
+    if result['sop']:
+        print(f"   ⚠️ {result['sop']}")
+
+
+if __name__ == "__main__":
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    ap = argparse.ArgumentParser(description="條碼申報資料查詢 (CLI / HTTP 服務)")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p_serve = sub.add_parser("serve", help="啟動本機 HTTP 查詢服務")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p_serve.add_argument("--pool-size", type=int, default=POOL_SIZE)
+
+    p_lookup = sub.add_parser("lookup", help="查詢一或多個條碼")
+    p_lookup.add_argument("barcodes", nargs="+")
+    p_lookup.add_argument("--json", action="store_true", help="輸出 JSON")
+
+    sub.add_parser("batch", help="由 stdin 讀入條碼 (每行一個)，輸出 JSON lines")
+
+    args = ap.parse_args()
+
+    if args.command == "serve":
+        serve(args.host, args.port, args.pool_size)
+        sys.exit(0)
+
+    service = LookupService(ConnectionPool(1))
+    try:
+        if args.command == "lookup":
+            results = service.lookup_many(args.barcodes)
+            if args.json:
+                print(json.dumps(results, ensure_ascii=False, indent=2))
+            else:
+                for r in results:
+                    _print_result(r)
+        else:
+            chunk = []
+            for line in sys.stdin:
+                if line.strip():
+                    chunk.append(line.strip())
+                if len(chunk) >= MAX_BATCH:
+                    for r in service.lookup_many(chunk):
+                        print(json.dumps(r, ensure_ascii=False))
+                    chunk = []
+            if chunk:
+                for r in service.lookup_many(chunk):
+                    print(json.dumps(r, ensure_ascii=False))
+    except Exception as e:
+        print(f"❌ 查詢失敗: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        service.close()
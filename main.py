@@ -2,9 +2,8 @@ import customtkinter as ctk
 from tkinter import ttk, messagebox
 import threading
 import os
-import subprocess
 import sys
-from database import create_connection, close_connection
+# 注意：database (pymysql / dotenv) 於第一次使用時才載入，讓登入畫面先顯示
 
 # --- 系統設定 ---
 ctk.set_appearance_mode("Light")  # 強制淺色模式以符合您的白底黑字需求
@@ -31,6 +30,20 @@ class CustomsApp(ctk.CTk):
         # 啟動登入畫面
         self.show_login_screen()
 
+        # 畫面繪製完成後，才在背景預先載入資料庫模組 (不連線)
+        self.after_idle(self._prewarm_db_modules)
+
+    def _prewarm_db_modules(self):
+        """ 背景預載 database / pymysql，讓使用者按下登入時不必等待 import """
+        def _load():
+            try:
+                import database  # noqa: F401
+                import pymysql  # noqa: F401
+            except Exception as e:
+                print(f"預載資料庫模組失敗: {e}")
+
+        threading.Thread(target=_load, daemon=True).start()
+
     # ==========================
     # 畫面 1: 登入頁面
     # ==========================
@@ -72,6 +85,8 @@ class CustomsApp(ctk.CTk):
         threading.Thread(target=self._login_thread, args=(user_input, pass_input)).start()
 
     def _login_thread(self, user, pwd):
+        from database import create_connection, close_connection
+
         conn = create_connection()
         if conn:
             try:
@@ -127,7 +142,7 @@ class CustomsApp(ctk.CTk):
         # === 藍色框區域 (功能選單) ===
         # 修改：字體改為黑色、粗體，hover 效果保留藍色
         self.create_sidebar_btn("📦 進口查詢 (主頁)", 2, command=self.show_search_page)
-        self.create_sidebar_btn("📋 歷史報單", 3, command=lambda: messagebox.showinfo("提示", "功能開發中"))
+        self.create_sidebar_btn("📋 歷史報單", 3, command=self.show_history_page)
         
         if self.current_user['role'] == 'admin':
             # 分隔線
@@ -234,41 +249,15 @@ class CustomsApp(ctk.CTk):
         for row in self.tree.get_children():
             self.tree.delete(row)
 
+        from database import create_connection, close_connection
+        from search import search_items
+
         conn = create_connection()
         if conn:
             try:
                 with conn.cursor() as cursor:
-                    # 修改 SQL：使用 JOIN 連結三個表，以取得報單號碼
-                    base_sql = """
-                        SELECT 
-                            d.decl_no, 
-                            p.barcode, 
-                            p.name_en, 
-                            i.applied_ccc_code, 
-                            i.applied_permit_no, 
-                            p.risk_note
-                        FROM declaration_items i
-                        JOIN products p ON i.product_id = p.product_id
-                        JOIN declarations d ON i.declaration_id = d.declaration_id
-                    """
-                    
-                    if init:
-                        # 初始顯示最新進口的 50 筆
-                        sql = base_sql + " ORDER BY d.import_date DESC, i.item_id ASC LIMIT 50"
-                        cursor.execute(sql)
-                    else:
-                        # 模糊搜尋
-                        sql = base_sql + """
-                            WHERE p.barcode LIKE %s 
-                               OR p.name_en LIKE %s 
-                               OR i.applied_ccc_code LIKE %s
-                               OR d.decl_no LIKE %s
-                            ORDER BY d.import_date DESC LIMIT 100
-                        """
-                        param = f"%{keyword}%"
-                        cursor.execute(sql, (param, param, param, param))
-                    
-                    rows = cursor.fetchall()
+                    # 查詢 SQL 與 lookup_service 共用 (search.py)
+                    rows = search_items(cursor, keyword, init=init)
                     for r in rows:
                         note = r['risk_note'] if r['risk_note'] else ""
                         permit = r['applied_permit_no'] if r['applied_permit_no'] else ""
@@ -288,6 +277,180 @@ class CustomsApp(ctk.CTk):
             finally:
                 close_connection(conn)
 
+    # ==========================
+    # 功能: 歷史報單統計儀表板
+    # ==========================
+    def show_history_page(self):
+        """ 歷史統計：只查詢 summary_* 彙總表 (由 import_tool 匯入時增量維護) """
+        for widget in self.main_area.winfo_children():
+            widget.destroy()
+
+        # 篩選列
+        filter_panel = ctk.CTkFrame(self.main_area, fg_color="#D0D0D0")
+        filter_panel.pack(fill="x", pady=(0, 10))
+
+        ctk.CTkLabel(filter_panel, text="進口月份:", font=self.main_font, text_color="black").pack(side="left", padx=(20, 5), pady=20)
+        self.history_month = ctk.CTkOptionMenu(filter_panel, values=["全部"], width=140, font=self.main_font,
+                                               command=lambda _: self.load_history_data())
+        self.history_month.pack(side="left", padx=5)
+
+        ctk.CTkButton(filter_panel, text="🔄 重新整理", width=120, font=self.main_font,
+                      command=lambda: self.load_history_data(reload_months=True)).pack(side="left", padx=10)
+
+        ctk.CTkButton(filter_panel, text="📤 匯出明細", width=120, font=self.main_font,
+                      command=self.show_export_dialog).pack(side="right", padx=20)
+
+        self.lbl_history_total = ctk.CTkLabel(filter_panel, text="", font=self.sidebar_font, text_color="black")
+        self.lbl_history_total.pack(side="left", padx=20)
+
+        # 統計表格區 (上排三個彙總，下排報單清單)
+        grid = ctk.CTkFrame(self.main_area, fg_color="transparent")
+        grid.pack(fill="both", expand=True)
+        for c in range(3):
+            grid.grid_columnconfigure(c, weight=1)
+        grid.grid_rowconfigure(0, weight=1)
+        grid.grid_rowconfigure(1, weight=1)
+
+        self.tree_by_month = self._create_stat_tree(grid, 0, 0, (("import_month", "進口月份", 120), ("item_count", "項次數", 100)))
+        self.tree_by_ccc = self._create_stat_tree(grid, 0, 1, (("ccc_prefix", "稅則 (前4碼)", 120), ("item_count", "項次數", 100)))
+        self.tree_by_country = self._create_stat_tree(grid, 0, 2, (("origin_country", "生產國別", 140), ("item_count", "項次數", 100)))
+        self.tree_decls = self._create_stat_tree(grid, 1, 0, (
+            ("decl_no", "報單號碼", 200),
+            ("import_month", "進口月份", 120),
+            ("item_count", "項次數", 100),
+            ("last_imported_at", "最後匯入時間", 200),
+        ), columnspan=3)
+
+        self.load_history_data(reload_months=True)
+
+    def _create_stat_tree(self, parent, row, column, cols, columnspan=1):
+        frame = ctk.CTkFrame(parent)
+        frame.grid(row=row, column=column, columnspan=columnspan, sticky="nsew", padx=5, pady=5)
+
+        tree = ttk.Treeview(frame, columns=[c[0] for c in cols], show="headings")
+        for key, title, width in cols:
+            tree.heading(key, text=title)
+            tree.column(key, width=width, anchor="center")
+
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        tree.configure(yscroll=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        tree.pack(fill="both", expand=True)
+        return tree
+
+    def load_history_data(self, reload_months=False):
+        import summary
+        from database import create_connection, close_connection
+
+        selected = self.history_month.get()
+        month = None if selected == "全部" else selected
+        if month == "未填":
+            month = ""
+
+        conn = create_connection()
+        if conn:
+            try:
+                with conn.cursor() as cursor:
+                    if reload_months:
+                        months = [m if m else "未填" for m in summary.fetch_months(cursor)]
+                        self.history_month.configure(values=["全部"] + months)
+                    data = summary.fetch_dashboard(cursor, month=month)
+            except Exception as e:
+                print(f"統計查詢錯誤: {e}")
+                messagebox.showerror("錯誤", f"統計查詢失敗: {e}\n\n若尚未建立統計資料，請執行 python summary.py --rebuild")
+                return
+            finally:
+                close_connection(conn)
+        else:
+            return
+
+        self.lbl_history_total.configure(text=f"報單 {data['total_decls']:,} 張 / 項次 {data['total_items']:,} 筆")
+
+        def fill(tree, rows, keys):
+            for r in tree.get_children():
+                tree.delete(r)
+            for row in rows:
+                tree.insert("", "end", values=[row[k] if row[k] not in (None, "") else "未填" for k in keys])
+
+        fill(self.tree_by_month, data['by_month'], ("import_month", "item_count"))
+        fill(self.tree_by_ccc, data['by_ccc'], ("ccc_prefix", "item_count"))
+        fill(self.tree_by_country, data['by_country'], ("origin_country", "item_count"))
+        fill(self.tree_decls, data['declarations'], ("decl_no", "import_month", "item_count", "last_imported_at"))
+
+    # ==========================
+    # 功能: 區間明細匯出 (稽核用)
+    # ==========================
+    def show_export_dialog(self):
+        """ 選擇日期區間與檔名後，在背景串流匯出 (export_tool 使用 server-side cursor) """
+        dialog = ctk.CTkToplevel(self)
+        dialog.title("匯出報單明細")
+        dialog.geometry("420x300")
+        dialog.transient(self)
+        dialog.grab_set()
+
+        ctk.CTkLabel(dialog, text="進口日期區間 (YYYY-MM-DD)", font=self.main_font).pack(pady=(20, 10))
+
+        entry_start = ctk.CTkEntry(dialog, placeholder_text="起始日期", width=250, font=self.main_font)
+        entry_start.pack(pady=5)
+        entry_end = ctk.CTkEntry(dialog, placeholder_text="結束日期 (含)", width=250, font=self.main_font)
+        entry_end.pack(pady=5)
+
+        progress = ctk.CTkProgressBar(dialog, width=300)
+        progress.set(0)
+        progress.pack(pady=(15, 5))
+        lbl_status = ctk.CTkLabel(dialog, text="", font=self.main_font)
+        lbl_status.pack(pady=5)
+
+        cancel_event = threading.Event()
+        dialog.protocol("WM_DELETE_WINDOW", lambda: (cancel_event.set(), dialog.destroy()))
+
+        def on_progress(rows_done, total_rows, rate):
+            def update():
+                if not dialog.winfo_exists():
+                    return
+                progress.set(rows_done / total_rows if total_rows else 0)
+                lbl_status.configure(text=f"{rows_done:,} / {total_rows:,} 筆　{rate:,.0f} 筆/秒")
+            self.after(0, update)
+
+        def start_export():
+            from tkinter import filedialog
+            start, end = entry_start.get().strip(), entry_end.get().strip()
+            if not start or not end:
+                lbl_status.configure(text="❌ 請輸入起訖日期", text_color="red")
+                return
+
+            path = filedialog.asksaveasfilename(
+                parent=dialog,
+                title="匯出檔案",
+                defaultextension=".csv",
+                initialfile=f"Export_{start}_{end}.csv",
+                filetypes=[("CSV 檔案", "*.csv"), ("Excel 檔案", "*.xlsx")],
+            )
+            if not path:
+                return
+
+            btn_export.configure(state="disabled", text="匯出中...")
+            lbl_status.configure(text="⏳ 連線資料庫中...", text_color="blue")
+
+            def worker():
+                from export_tool import export_history
+                # 日期格式錯誤、失敗或取消時回傳 None (取消時未完成的檔案已刪除)
+                count = export_history(start, end, path, progress_callback=on_progress, cancel_event=cancel_event)
+                self.after(0, lambda: finish(count, path))
+
+            threading.Thread(target=worker, daemon=True).start()
+
+        def finish(count, path):
+            if count is not None:
+                messagebox.showinfo("匯出完成", f"✅ 已匯出 {count:,} 筆\n\n{path}")
+            elif not cancel_event.is_set():
+                messagebox.showerror("匯出失敗", "❌ 匯出失敗，請確認日期格式 (YYYY-MM-DD) 並檢查終端機訊息。")
+            if dialog.winfo_exists():
+                dialog.destroy()
+
+        btn_export = ctk.CTkButton(dialog, text="選擇檔案並匯出", width=250, font=self.main_font, command=start_export)
+        btn_export.pack(pady=(10, 20))
+
     def on_tree_double_click(self, event):
         """ 處理雙擊事件：開啟許可證 PDF """
         # 1. 判斷點擊的是哪一列
@@ -324,6 +487,7 @@ class CustomsApp(ctk.CTk):
                 if sys.platform == "win32":
                     os.startfile(filepath) # Windows 原生開啟
                 else:
+                    import subprocess
                     subprocess.call(["xdg-open", filepath]) # Linux/Mac
             except Exception as e:
                 messagebox.showerror("錯誤", f"無法開啟檔案: {e}")
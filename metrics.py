@@ -0,0 +1,228 @@
+import os
+import json
+import time
+from contextlib import contextmanager
+
+# ==========================================
+# 匯入效能量測 (每種 SQL 的延遲分布 / 往返次數 / 吞吐量 / 鎖等待)
+# ==========================================
+# 用法：
+#   m = ImportMetrics()
+#   m.execute(cursor, "product_upsert", sql, params)   # 取代 cursor.execute
+#   m.row_done()                                        # 每處理完一列呼叫一次
+#   m.write_json("import_metrics.json"); m.write_prometheus("import.prom")
+
+# 延遲分布的桶 (毫秒)，雲端連線通常落在 5~100ms
+LATENCY_BUCKETS_MS = [0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+SLOW_STATEMENT_MS = float(os.getenv("IMPORT_SLOW_MS", 200))
+SLOW_LOG_LIMIT = 50
+THROUGHPUT_INTERVAL_SEC = 1.0
+
+# MySQL 錯誤碼
+ER_LOCK_WAIT_TIMEOUT = 1205  # 只回滾該句，可重試
+ER_LOCK_DEADLOCK = 1213      # 整個 transaction 已被回滾，不能只重試該句
+LOCK_RETRY_LIMIT = 3
+
+
+class _Histogram:
+    __slots__ = ("counts", "total_ms", "count", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)  # 最後一格為 +Inf
+        self.total_ms = 0.0
+        self.count = 0
+        self.max_ms = 0.0
+
+    def observe(self, ms):
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total_ms += ms
+        self.count += 1
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, q):
+        """ 由分桶估計百分位數 (回傳該桶上限) """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        running = 0
+        for i, c in enumerate(self.counts):
+            running += c
+            if running >= target:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self):
+        buckets = {f"le_{b}": c for b, c in zip(LATENCY_BUCKETS_MS, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": buckets,
+        }
+
+
+class ImportMetrics:
+    def __init__(self, source=""):
+        self.source = source
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.statements = {}   # 名稱 -> _Histogram
+        self.phases = {}       # 名稱 -> 秒
+        self.round_trips = 0
+        self.rows = 0
+        self.lock_waits = 0
+        self.lock_retries = 0
+        self.deadlocks = 0
+        self.slow_log = []
+        self.throughput = []   # [(經過秒數, 累計列數)]
+        self._last_sample = self._t0
+
+    # ---------- 量測 ----------
+
+    def execute(self, cursor, name, sql, params=None):
+        """ 取代 cursor.execute：量測延遲，遇到鎖等待逾時自動重試 """
+        attempt = 0
+        while True:
+            t = time.perf_counter()
+            try:
+                result = cursor.execute(sql, params)
+            except Exception as e:
+                code = e.args[0] if e.args else None
+                self._observe(name, (time.perf_counter() - t) * 1000, params)
+                if code == ER_LOCK_WAIT_TIMEOUT:
+                    self.lock_waits += 1
+                    if attempt < LOCK_RETRY_LIMIT:
+                        attempt += 1
+                        self.lock_retries += 1
+                        time.sleep(0.2 * attempt)
+                        continue
+                elif code == ER_LOCK_DEADLOCK:
+                    self.deadlocks += 1
+                raise
+            self._observe(name, (time.perf_counter() - t) * 1000, params)
+            return result
+
+    def _observe(self, name, ms, params):
+        self.round_trips += 1
+        hist = self.statements.get(name)
+        if hist is None:
+            hist = self.statements[name] = _Histogram()
+        hist.observe(ms)
+        if ms >= SLOW_STATEMENT_MS and len(self.slow_log) < SLOW_LOG_LIMIT:
+            self.slow_log.append({
+                "statement": name,
+                "ms": round(ms, 3),
+                "at_sec": round(time.perf_counter() - self._t0, 3),
+                "params": [str(p)[:40] for p in (params or ())],
+            })
+
+    @contextmanager
+    def phase(self, name):
+        """ 量測一個階段 (例如檢查、統計表更新、commit) 的總耗時 """
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - t
+
+    def row_done(self):
+        self.rows += 1
+        now = time.perf_counter()
+        if now - self._last_sample >= THROUGHPUT_INTERVAL_SEC:
+            self.throughput.append((round(now - self._t0, 3), self.rows))
+            self._last_sample = now
+
+    # ---------- 輸出 ----------
+
+    def elapsed(self):
+        return time.perf_counter() - self._t0
+
+    def to_dict(self):
+        elapsed = self.elapsed()
+        timeline = list(self.throughput) + [(round(elapsed, 3), self.rows)]
+        rates = []
+        prev_t, prev_rows = 0.0, 0
+        for t, rows in timeline:
+            if t > prev_t:
+                rates.append({"t_sec": t, "rows": rows, "rows_per_sec": round((rows - prev_rows) / (t - prev_t), 1)})
+            prev_t, prev_rows = t, rows
+
+        return {
+            "source": self.source,
+            "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started_at)),
+            "elapsed_sec": round(elapsed, 3),
+            "rows": self.rows,
+            "rows_per_sec": round(self.rows / elapsed, 1) if elapsed > 0 else 0.0,
+            "round_trips": self.round_trips,
+            "round_trips_per_row": round(self.round_trips / self.rows, 2) if self.rows else 0.0,
+            "lock_waits": self.lock_waits,
+            "lock_retries": self.lock_retries,
+            "deadlocks": self.deadlocks,
+            "statements": {name: h.to_dict() for name, h in sorted(self.statements.items())},
+            "phases_sec": {name: round(sec, 3) for name, sec in self.phases.items()},
+            "throughput": rates,
+            "slow_statements": self.slow_log,
+        }
+
+    def print_summary(self):
+        d = self.to_dict()
+        print(f"⏱️ 匯入效能: {d['rows']} 列 / {d['elapsed_sec']} 秒 ({d['rows_per_sec']} 列/秒)，"
+              f"往返 {d['round_trips']} 次 ({d['round_trips_per_row']} 次/列)，"
+              f"鎖等待 {d['lock_waits']} 次 / 重試 {d['lock_retries']} 次")
+        ranked = sorted(d['statements'].items(), key=lambda kv: kv[1]['total_ms'], reverse=True)
+        for name, s in ranked:
+            print(f"   {name:<20} {s['count']:>7} 次  總 {s['total_ms']:>10.1f} ms  "
+                  f"avg {s['avg_ms']:>7.2f}  p95 ≤{s['p95_ms']}  max {s['max_ms']:.1f}")
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        print(f"📈 效能報告已儲存至: {path}")
+
+    def write_prometheus(self, path):
+        """ Prometheus textfile collector 格式 (node_exporter --collector.textfile) """
+        lines = [
+            "# HELP customs_import_statement_latency_ms SQL statement latency in milliseconds",
+            "# TYPE customs_import_statement_latency_ms histogram",
+        ]
+        for name, h in sorted(self.statements.items()):
+            running = 0
+            for bound, c in zip(LATENCY_BUCKETS_MS, h.counts):
+                running += c
+                lines.append(f'customs_import_statement_latency_ms_bucket{{statement="{name}",le="{bound}"}} {running}')
+            lines.append(f'customs_import_statement_latency_ms_bucket{{statement="{name}",le="+Inf"}} {h.count}')
+            lines.append(f'customs_import_statement_latency_ms_sum{{statement="{name}"}} {h.total_ms:.3f}')
+            lines.append(f'customs_import_statement_latency_ms_count{{statement="{name}"}} {h.count}')
+
+        elapsed = self.elapsed()
+        gauges = [
+            ("customs_import_rows", "Rows processed by the last import", self.rows),
+            ("customs_import_duration_seconds", "Duration of the last import", round(elapsed, 3)),
+            ("customs_import_rows_per_second", "Throughput of the last import", round(self.rows / elapsed, 3) if elapsed > 0 else 0),
+            ("customs_import_round_trips", "SQL round trips of the last import", self.round_trips),
+            ("customs_import_lock_waits", "Lock wait timeouts in the last import", self.lock_waits),
+            ("customs_import_lock_retries", "Statement retries after lock wait timeout", self.lock_retries),
+            ("customs_import_deadlocks", "Deadlocks in the last import", self.deadlocks),
+        ]
+        for metric, help_text, value in gauges:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+
+        # textfile collector 要求原子寫入
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+        print(f"📈 Prometheus 指標已寫入: {path}")
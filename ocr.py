@@ -0,0 +1,179 @@
+import os
+import csv
+import io
+import json
+import shutil
+import hashlib
+import tempfile
+import subprocess
+from functools import lru_cache
+
+# ==========================================
+# OCR 備援 (掃描 / 傳真的放行報單沒有文字層)
+# ==========================================
+# 只對 extract_words 為空的頁面執行，使用本機 Tesseract (離線)。
+# OCR 在獨立且有上限的 process pool 中執行，不會拖住一般 PDF 的解析；
+# 結果依「頁面內容雜湊」快取，同一張掃描頁不會辨識第二次。
+# 輸出的 word 與 pdfplumber 相同格式 (text / x0 / top，單位 pt)，直接套用既有的區塊邏輯。
+
+OCR_TESSERACT_CMD = os.getenv("TESSERACT_CMD", "tesseract")
+OCR_LANG = os.getenv("OCR_LANG", "chi_tra+eng")
+OCR_RESOLUTION = 300          # 轉圖解析度 (DPI)
+OCR_MAX_WORKERS = 2           # OCR process 數上限
+OCR_CACHE_DIR = "./ocr_cache"
+OCR_TIMEOUT = 120             # 單頁辨識逾時 (秒)
+OCR_MIN_CONF = 30             # 信心值低於此值的字丟棄
+OCR_PSM = "6"                 # Tesseract 版面分析模式 (單一文字區塊)
+
+_pool = None
+
+
+def is_available():
+    """ 本機是否有 Tesseract 可用 """
+    return shutil.which(OCR_TESSERACT_CMD) is not None
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        from concurrent.futures import ProcessPoolExecutor
+        _pool = ProcessPoolExecutor(max_workers=OCR_MAX_WORKERS)
+    return _pool
+
+
+def shutdown_pool():
+    """ 關閉 OCR pool；尚未開始的工作直接取消 (批次中途出錯時不必等它們跑完) """
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def submit_pages(pdf_path, page_indices):
+    """
+    將指定頁面送進 OCR pool，回傳 Future。
+    Future 結果為 {頁碼: [word dict, ...]}，可直接傳給 parser.parse_single_pdf(ocr_words=...)。
+    """
+    return _get_pool().submit(
+        ocr_pdf_pages, pdf_path, list(page_indices),
+        OCR_TESSERACT_CMD, OCR_LANG, OCR_RESOLUTION, OCR_CACHE_DIR,
+    )
+
+# ==========================================
+# 以下在 worker process 中執行
+# ==========================================
+
+@lru_cache(maxsize=None)
+def tesseract_version(cmd=OCR_TESSERACT_CMD):
+    """ Tesseract 版本字串 (第一行)；無法取得時回傳 "unknown" """
+    try:
+        proc = subprocess.run([cmd, "--version"], capture_output=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+    # 舊版把版本資訊印在 stderr
+    out = (proc.stdout or proc.stderr).decode('utf-8', errors='replace').strip()
+    return out.splitlines()[0] if out else "unknown"
+
+
+def page_hash(page, resolution=OCR_RESOLUTION, lang=OCR_LANG, cmd=OCR_TESSERACT_CMD):
+    """
+    以頁面尺寸 + 內嵌影像原始資料計算雜湊；沒有內嵌影像時改用轉圖後的像素。
+    辨識語言、Tesseract 版本與參數也納入雜湊，改設定後不會沿用舊的辨識結果。
+    """
+    config = f"{resolution}|{lang}|psm{OCR_PSM}|{tesseract_version(cmd)}"
+    h = hashlib.sha1(f"{float(page.width):.2f}x{float(page.height):.2f}@{config}".encode())
+    images = page.images
+    if images:
+        for img in images:
+            h.update(img['stream'].get_rawdata() or b"")
+    else:
+        h.update(page.to_image(resolution=resolution).original.tobytes())
+    return h.hexdigest()
+
+
+def _read_cache(cache_dir, digest):
+    path = os.path.join(cache_dir, f"{digest}.json")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(cache_dir, digest, words):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{digest}.json")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(words, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def parse_tesseract_tsv(tsv_text, resolution):
+    """ Tesseract TSV -> pdfplumber 格式的 word 清單 (像素換算成 pt) """
+    scale = 72.0 / resolution
+    words = []
+    reader = csv.DictReader(io.StringIO(tsv_text), delimiter='\t', quoting=csv.QUOTE_NONE)
+    for row in reader:
+        if row.get('level') != '5':
+            continue
+        text = (row.get('text') or "").strip()
+        if not text:
+            continue
+        try:
+            if float(row.get('conf', -1)) < OCR_MIN_CONF:
+                continue
+            left = int(row['left'])
+            top = int(row['top'])
+            width = int(row['width'])
+            height = int(row['height'])
+        except (KeyError, ValueError):
+            continue
+        words.append({
+            'text': text,
+            'x0': left * scale,
+            'x1': (left + width) * scale,
+            'top': top * scale,
+            'bottom': (top + height) * scale,
+        })
+    return words
+
+
+def _run_tesseract(image, cmd, lang, resolution):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        png_path = os.path.join(tmp_dir, "page.png")
+        image.save(png_path, dpi=(resolution, resolution))
+        proc = subprocess.run(
+            [cmd, png_path, "stdout", "-l", lang, "--psm", OCR_PSM, "--dpi", str(resolution), "tsv"],
+            capture_output=True,
+            timeout=OCR_TIMEOUT,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.decode('utf-8', errors='replace').strip())
+    return proc.stdout.decode('utf-8', errors='replace')
+
+
+def ocr_pdf_pages(pdf_path, page_indices, cmd=OCR_TESSERACT_CMD, lang=OCR_LANG,
+                  resolution=OCR_RESOLUTION, cache_dir=OCR_CACHE_DIR):
+    """ 辨識指定頁面，回傳 {頁碼: [word dict, ...]}；失敗的頁面不列入 """
+    import pdfplumber
+
+    results = {}
+    with pdfplumber.open(pdf_path) as pdf:
+        for idx in page_indices:
+            page = pdf.pages[idx]
+            try:
+                digest = page_hash(page, resolution, lang, cmd)
+                words = _read_cache(cache_dir, digest)
+                if words is None:
+                    image = page.to_image(resolution=resolution).original
+                    words = parse_tesseract_tsv(_run_tesseract(image, cmd, lang, resolution), resolution)
+                    _write_cache(cache_dir, digest, words)
+                results[idx] = words
+            except Exception as e:
+                print(f"⚠️ OCR 失敗: {os.path.basename(pdf_path)} 第 {idx + 1} 頁 - {e}")
+            finally:
+                page.flush_cache()
+    return results
@@ -0,0 +1,140 @@
+import os
+import re
+import json
+import hashlib
+
+# ==========================================
+# 增量解析快取 (更正 / 修改後的報單只重新抽取有變動的頁面)
+# ==========================================
+# 1. 頁面快取 pages/<頁面指紋>.json：該頁濾除表頭後的 words (text, x0, top)
+#    指紋 = 頁面尺寸 + 內容串流與 /Resources (字型、XObject) 原始位元組的雜湊，
+#    計算約 1ms/頁，extract_words 則需數百 ms。
+#    words 與版面設定檔無關，所以換了設定檔仍可沿用；區塊邏輯每次都重跑 (很便宜)，
+#    跨頁的項次仍由 last_item_idx 承接合併。
+# 2. 報單清單 decl/<報單號碼>.json：上次解析的頁面指紋與結果，
+#    用來比對這次有哪些頁面 / 項次變更。
+
+PARSE_CACHE_DIR = "./parse_cache"
+CACHE_FORMAT = 1  # words 的格式或雜訊過濾規則改變時請遞增，讓舊快取失效
+
+
+def _hash_object(h, obj, seen, depth=0):
+    """ 將 PDF 物件 (含間接參照的字型、XObject 串流) 依內容寫入雜湊 """
+    from pdfminer.pdftypes import PDFObjRef, PDFStream, resolve1
+
+    if isinstance(obj, PDFObjRef):
+        if obj.objid in seen or depth > 32:
+            h.update(f"ref{obj.objid}".encode())
+            return
+        seen.add(obj.objid)
+        obj = resolve1(obj)
+
+    if isinstance(obj, PDFStream):
+        _hash_object(h, obj.attrs, seen, depth + 1)
+        h.update(obj.get_rawdata() or b"")
+    elif isinstance(obj, dict):
+        for key in sorted(obj, key=str):
+            h.update(f"/{key}".encode())
+            _hash_object(h, obj[key], seen, depth + 1)
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"[")
+        for item in obj:
+            _hash_object(h, item, seen, depth + 1)
+        h.update(b"]")
+    else:
+        h.update(repr(obj).encode())
+
+
+def page_fingerprint(page):
+    """
+    頁面內容指紋 (不需解析文字)：內容串流 + /Resources (字型、XObject 等)。
+    內容串流相同但字型對應 (ToUnicode) 或 XObject 不同時，抽出的文字也不同，不可沿用快取。
+    """
+    from pdfminer.pdftypes import resolve1
+
+    h = hashlib.sha1(f"v{CACHE_FORMAT}|{tuple(float(v) for v in page.mediabox)}".encode())
+    for stream in page.page_obj.contents:
+        h.update(resolve1(stream).get_rawdata() or b"")
+    h.update(b"|resources|")
+    _hash_object(h, page.page_obj.resources, set())
+    return h.hexdigest()
+
+
+def _page_path(digest):
+    return os.path.join(PARSE_CACHE_DIR, "pages", f"{digest}.json")
+
+
+def _decl_path(decl_no, source_file):
+    """
+    清單以報單號碼為鍵；未能解析出報單號碼 (parser 預設值 "Unknown") 時改以來源檔名為鍵，
+    避免不相關的檔案共用同一份清單、互相誤報變更。
+    """
+    if decl_no and decl_no != "Unknown":
+        name = re.sub(r"[^A-Za-z0-9_-]", "_", decl_no)
+    else:
+        digest = hashlib.sha1(source_file.encode('utf-8')).hexdigest()[:12]
+        name = f"file_{re.sub(r'[^A-Za-z0-9_-]', '_', source_file)}_{digest}"
+    return os.path.join(PARSE_CACHE_DIR, "decl", f"{name}.json")
+
+
+def _read(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_page(digest):
+    """ 回傳 {'words': [[text, x0, top], ...], 'decl_no'?, 'profile'?} 或 None """
+    return _read(_page_path(digest))
+
+
+def save_page(digest, words, **extra):
+    entry = {'words': [[w.text, w.x0, w.top] for w in words]}
+    entry.update(extra)
+    try:
+        _write(_page_path(digest), entry)
+    except OSError as e:
+        print(f"⚠️ 無法寫入解析快取: {e}")
+
+
+def load_manifest(decl_no, source_file):
+    return _read(_decl_path(decl_no, source_file))
+
+
+def save_manifest(decl_no, page_hashes, rows, source_file):
+    try:
+        _write(_decl_path(decl_no, source_file), {
+            'decl_no': decl_no,
+            'source_file': source_file,
+            'pages': page_hashes,
+            'rows': rows,
+        })
+    except OSError as e:
+        print(f"⚠️ 無法寫入解析快取: {e}")
+
+
+def diff_items(old_rows, new_rows):
+    """ 比對兩次解析結果，回傳 (新增或變更的項次, 移除的項次)；原始檔名不列入比較 """
+    def key(rows):
+        return {
+            r['項次']: {k: v for k, v in r.items() if k != '原始檔名'}
+            for r in rows
+        }
+
+    old = key(old_rows or [])
+    new = key(new_rows)
+    changed = sorted(n for n, r in new.items() if old.get(n) != r)
+    removed = sorted(n for n in old if n not in new)
+    return changed, removed
@@ -1,10 +1,16 @@
-import pdfplumber
-import pandas as pd
 import re
 import os
+import csv
 import glob
 import shutil
 import time
+from bisect import bisect_left, bisect_right
+from layout import DEFAULT_PROFILE, detect_profile, load_profiles
+from description import normalize_description
+import ocr
+import parse_cache
+import validator
+# pdfplumber 只在真正解析 PDF 時才載入；輸出 CSV 使用標準函式庫，不再依賴 pandas
 
 # ==========================================
 # 1. 系統參數與路徑設定
@@ -13,12 +19,11 @@ INPUT_DIR = "./inpdf"        # 待處理檔案目錄
 PROCESSED_DIR = "./overpdf"  # 處理完成檔案移入目錄
 OUTPUT_CSV = "Batch_Import_Declarations.csv" # 最終彙整的 CSV 檔名
 
-# --- 以下核心參數維持 V12.0 邏輯不變 ---
-COORD_ITEM_MAX_X = 50
-COORD_DESC_MIN_X = 10
-COORD_DESC_MAX_X = 202
-COORD_SPLIT_CCC = 202
-COORD_NOISE_START = 315
+# --- 欄位座標改由 layout.py 的版面設定檔提供 (每個檔案自動偵測) ---
+# 以下保留 V12.0 預設值，供舊程式參考
+COORD_DESC_MIN_X = DEFAULT_PROFILE.desc_min_x
+COORD_SPLIT_CCC = DEFAULT_PROFILE.split_ccc
+COORD_NOISE_START = DEFAULT_PROFILE.noise_start
 
 GLOBAL_IGNORE_KEYWORDS = [
     "報單號碼", "主提單號碼", "生產國別", "輸出入許可文件號碼", 
@@ -32,11 +37,15 @@ GLOBAL_IGNORE_KEYWORDS = [
 # 2. 核心邏輯函式 (維持 V12.0 不變)
 # ==========================================
 
+# 預先去除關鍵字空白，避免每個 word 都重算一次
+_IGNORE_KEYWORDS_CLEAN = tuple(kw.replace(" ", "") for kw in GLOBAL_IGNORE_KEYWORDS)
+_ITEM_NO_RE = re.compile(r"^\d+\.$")
+
 def is_header_noise(text):
     if not text: return False
     clean_t = text.replace(" ", "")
-    for kw in GLOBAL_IGNORE_KEYWORDS:
-        if kw.replace(" ", "") in clean_t:
+    for kw in _IGNORE_KEYWORDS_CLEAN:
+        if kw in clean_t:
             return True
     return False
 
@@ -106,90 +115,209 @@ def generate_sop(ccc, permit):
 # 3. 單一檔案解析引擎 (V12.0 邏輯)
 # ==========================================
 
-def parse_single_pdf(pdf_path):
-    # 這裡完全保留 V12.0 的核心解析流程
-    items = [] 
+class _Word:
+    """ 精簡版 word：pdfplumber 的 word dict 帶有十幾個用不到的欄位，只保留 text / x0 / top """
+    __slots__ = ("text", "x0", "top")
+
+    def __init__(self, text, x0, top):
+        self.text = text
+        self.x0 = x0
+        self.top = top
+
+
+class _Item:
+    """ 解析中的單一項次 (跨頁時持續累積 desc / ccc 片段) """
+    __slots__ = ("item_no", "decl_no", "desc_parts", "ccc_parts")
+
+    def __init__(self, item_no, decl_no):
+        self.item_no = item_no
+        self.decl_no = decl_no
+        self.desc_parts = []
+        self.ccc_parts = []
+
+
+def _reading_key(w):
+    # 同一行 (垂直誤差 2pt 內) 由左至右
+    return (round(w.top / 2), w.x0)
+
+
+def compact_words(raw_words):
+    """ 將 pdfplumber words 轉成 _Word 並濾掉表頭雜訊，依閱讀順序排序 """
+    words = [
+        _Word(w['text'], float(w['x0']), float(w['top']))
+        for w in raw_words
+        if not is_header_noise(w['text'])
+    ]
+    # sort 為 stable：與原本「先篩區塊再排序」的結果完全一致
+    words.sort(key=_reading_key)
+    return words
+
+
+def _parse_page_words(words, page_height, items, item_index, decl_no, last_item_idx, profile=DEFAULT_PROFILE):
+    """
+    處理單頁已排序的 words，依 profile 的欄位邊界把文字分配到對應項次。
+    回傳本頁最後一個項次編號 (供下一頁承接跨頁內容)。
+    """
+    desc_min_x = profile.desc_min_x
+    split_ccc = profile.split_ccc
+    noise_start = profile.noise_start
+
+    anchors = []
+    for w in words:
+        if w.x0 < split_ccc:
+            t = w.text.strip()
+            if _ITEM_NO_RE.match(t):
+                anchors.append((w.top, int(t.replace(".", ""))))
+    anchors.sort(key=lambda a: a[0])
+
+    # zone = (start_y, end_y, item_no)
+    zones = []
+    if anchors:
+        first_anchor_top = anchors[0][0]
+        if first_anchor_top > 10:
+            zones.append((0, first_anchor_top, last_item_idx))
+    else:
+        zones.append((0, page_height, last_item_idx))
+
+    for i in range(len(anchors)):
+        start_y, item_no = anchors[i]
+        end_y = anchors[i + 1][0] if i < len(anchors) - 1 else page_height
+        last_item_idx = item_no
+        zones.append((start_y, end_y, item_no))
+
+    # words 已依 round(top/2) 排序，用 bisect 直接定位區塊範圍，不必每個 zone 掃整頁
+    row_keys = [round(w.top / 2) for w in words]
+
+    for start_y, end_y, z_item_id in zones:
+        if z_item_id is None: continue
+
+        target_item = item_index.get(z_item_id)
+        if target_item is None:
+            target_item = _Item(z_item_id, decl_no)
+            item_index[z_item_id] = target_item
+            items.append(target_item)
+
+        lo = bisect_left(row_keys, round(start_y / 2))
+        hi = bisect_right(row_keys, round(end_y / 2))
+
+        for j in range(lo, hi):
+            w = words[j]
+            if not (start_y <= w.top < end_y): continue
+            x = w.x0
+            text = w.text
+
+            if desc_min_x <= x < split_ccc:
+                if _ITEM_NO_RE.match(text.strip()): continue
+                target_item.desc_parts.append(text)
+
+            elif split_ccc <= x < noise_start:
+                target_item.ccc_parts.append(text)
+
+    return last_item_idx
+
+
+def _extract_page(page, page_num, profile, ocr_words, textless_pages):
+    """ 抽取單頁 words；第一頁同時抓報單號並偵測版面。回傳 (words, decl_no, profile) """
+    decl_no = None
+    if page_num == 0:
+        # 抓報單號
+        p1_text = page.extract_text() or ""
+        if not p1_text.strip() and 0 in ocr_words:
+            p1_text = " ".join(w['text'] for w in ocr_words[0])
+        decl_match = re.search(r"([A-Z]{2}/[\s\d/]+/[A-Z0-9]+)", p1_text)
+        if decl_match: 
+            decl_no = decl_match.group(1).replace(" ", "").replace("//", "/")
+
+    raw_words = page.extract_words(keep_blank_chars=True)
+    if not raw_words:
+        if page_num in ocr_words:
+            raw_words = ocr_words[page_num]
+        elif textless_pages is not None:
+            textless_pages.append(page_num)
+
+    if page_num == 0 and profile is None:
+        profile = detect_profile(page.width, page.height, raw_words)
+
+    return compact_words(raw_words), decl_no, profile
+
+
+def parse_single_pdf(pdf_path, profile=None, ocr_words=None, textless_pages=None,
+                     use_cache=False, cache_stats=None):
+    # 這裡完全保留 V12.0 的核心解析流程；profile 為 None 時依第一頁自動偵測版面
+    # ocr_words: {頁碼: words}，沒有文字層的頁面改用 OCR 結果 (見 ocr.py)
+    # textless_pages: 傳入 list 時，記錄沒有文字層且尚無 OCR 結果的頁碼
+    # use_cache: 內容未變的頁面沿用 parse_cache 中的 words，不重新抽取 (見 parse_cache.py)
+    # cache_stats: 傳入 dict 時填入 pages / reused / page_hashes
+    ocr_words = ocr_words or {}
+    auto_profile = profile is None
+    page_hashes = []
+    reused = 0
+    items = []
+    item_index = {}  # item_no -> _Item
     last_item_idx = None 
     decl_no = "Unknown"
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            # 抓報單號
-            p1_text = pdf.pages[0].extract_text() or ""
-            decl_match = re.search(r"([A-Z]{2}/[\s\d/]+/[A-Z0-9]+)", p1_text)
-            if decl_match: 
-                decl_no = decl_match.group(1).replace(" ", "").replace("//", "/")
+        import pdfplumber
 
+        with pdfplumber.open(pdf_path) as pdf:
             for page_num, page in enumerate(pdf.pages):
-                words = page.extract_words(keep_blank_chars=True)
-                
-                valid_words = []
-                for w in words:
-                    if not is_header_noise(w['text']):
-                        valid_words.append(w)
-                words = valid_words
-
-                anchors = []
-                for w in words:
-                    if w['x0'] < COORD_SPLIT_CCC: 
-                        if re.match(r"^\d+\.$", w['text'].strip()):
-                            item_num = int(w['text'].strip().replace(".", ""))
-                            anchors.append({'item': item_num, 'top': w['top']})
-                anchors.sort(key=lambda x: x['top'])
-                
-                zones = []
-                if anchors:
-                    first_anchor_top = anchors[0]['top']
-                    if first_anchor_top > 10: 
-                        zones.append({'start_y': 0, 'end_y': first_anchor_top, 'item_id': last_item_idx})
+                cached = None
+                if use_cache:
+                    digest = parse_cache.page_fingerprint(page)
+                    page_hashes.append(digest)
+                    cached = parse_cache.load_page(digest)
+                    # 第一頁還需要報單號與版面設定檔，缺一就重新抽取
+                    if cached is not None and page_num == 0:
+                        cached_profile = load_profiles().get(cached.get('profile'))
+                        if 'decl_no' not in cached or (profile is None and cached_profile is None):
+                            cached = None
+                        elif profile is None:
+                            profile = cached_profile
+
+                if cached is not None:
+                    words = [_Word(text, x0, top) for text, x0, top in cached['words']]
+                    if page_num == 0:
+                        decl_no = cached['decl_no']
+                    reused += 1
                 else:
-                    zones.append({'start_y': 0, 'end_y': page.height, 'item_id': last_item_idx})
-                
-                for i in range(len(anchors)):
-                    start_y = anchors[i]['top']
-                    end_y = anchors[i+1]['top'] if i < len(anchors) - 1 else page.height
-                    last_item_idx = anchors[i]['item']
-                    zones.append({'start_y': start_y, 'end_y': end_y, 'item_id': anchors[i]['item']})
-                
-                for zone in zones:
-                    z_item_id = zone['item_id']
-                    if z_item_id is None: continue 
-                    
-                    target_item = next((it for it in items if it['item_no'] == z_item_id), None)
-                    if not target_item:
-                        target_item = {'item_no': z_item_id, 'desc_parts': [], 'ccc_parts': [], 'decl_no': decl_no}
-                        items.append(target_item)
-                    
-                    zone_words = [w for w in words if zone['start_y'] <= w['top'] < zone['end_y']]
-                    zone_words.sort(key=lambda w: (round(w['top']/2), w['x0']))
-                    
-                    for w in zone_words:
-                        x = w['x0']
-                        text = w['text']
-                        
-                        if COORD_DESC_MIN_X <= x < COORD_SPLIT_CCC:
-                            if re.match(r"^\d+\.$", text.strip()): continue 
-                            target_item['desc_parts'].append(text)
-                            
-                        elif COORD_SPLIT_CCC <= x < COORD_NOISE_START:
-                            target_item['ccc_parts'].append(text)
+                    words, page_decl_no, profile = _extract_page(page, page_num, profile, ocr_words, textless_pages)
+                    if page_decl_no:
+                        decl_no = page_decl_no
+                    if use_cache and words:
+                        extra = {}
+                        if page_num == 0:
+                            extra['decl_no'] = decl_no
+                            if auto_profile:
+                                extra['profile'] = profile.name
+                        parse_cache.save_page(digest, words, **extra)
+
+                last_item_idx = _parse_page_words(
+                    words, page.height, items, item_index, decl_no, last_item_idx, profile
+                )
+                page.flush_cache()
+
+        if cache_stats is not None:
+            cache_stats.update(pages=len(page_hashes), reused=reused, page_hashes=page_hashes)
 
         # 整理結果
         final_data = []
-        items.sort(key=lambda x: x['item_no'])
+        items.sort(key=lambda x: x.item_no)
         
         for it in items:
-            ccc_val, permit_val = extract_ccc_permit(it['ccc_parts'])
-            desc_val, country_val = extract_country_and_clean_desc(it['desc_parts'])
+            ccc_val, permit_val = extract_ccc_permit(it.ccc_parts)
+            desc_val, country_val = extract_country_and_clean_desc(it.desc_parts)
+            # 去除分隔線、貨櫃號碼等版面殘留
+            desc_val = normalize_description(desc_val)
             
             barcode = ""
-            full_raw_desc = " ".join(it['desc_parts'])
+            full_raw_desc = " ".join(it.desc_parts)
             bc_match = re.search(r"\b(\d{13})\b", full_raw_desc)
             if bc_match: barcode = bc_match.group(1)
 
             final_data.append({
-                "報單號碼": it['decl_no'],
-                "項次": it['item_no'],
+                "報單號碼": it.decl_no,
+                "項次": it.item_no,
                 "貨號/條碼": barcode,
                 "貨物名稱": desc_val,
                 "稅則號列": ccc_val,
@@ -209,6 +337,23 @@ def parse_single_pdf(pdf_path):
 # 4. 批次處理主程式
 # ==========================================
 
+def report_incremental_changes(filename, file_data, cache_stats):
+    """
+    與上次解析同一報單的結果比對，列出沿用頁數與變更項次，並更新快取清單。
+    沒有報單號碼 (Unknown) 的檔案只與同一檔名的上次結果比對。
+    """
+    if not file_data or not cache_stats:
+        return
+    decl_no = file_data[0]['報單號碼']
+    manifest = parse_cache.load_manifest(decl_no, filename)
+    if manifest:
+        changed, removed = parse_cache.diff_items(manifest.get('rows'), file_data)
+        print(f"\n♻️ {filename}: 沿用 {cache_stats['reused']}/{cache_stats['pages']} 頁，"
+              f"與上次 ({manifest.get('source_file')}) 相比變更 {len(changed)} 項、移除 {len(removed)} 項"
+              + (f" -> 項次 {changed[:20]}" if changed else ""))
+    parse_cache.save_manifest(decl_no, cache_stats['page_hashes'], file_data, filename)
+
+
 def main():
     # A. 初始化目錄
     if not os.path.exists(INPUT_DIR):
@@ -232,15 +377,12 @@ def main():
     all_batch_data = []
     success_count = 0
     fail_count = 0
+    ocr_jobs = []  # (file_path, Future)：等待 OCR 的掃描檔
 
-    # C. 迴圈處理
-    for file_path in pdf_files:
+    def finish_file(file_path, file_data):
+        nonlocal success_count, fail_count
         filename = os.path.basename(file_path)
-        print(f"   正在處理: {filename} ...", end="\r")
-        
-        # 執行解析
-        file_data = parse_single_pdf(file_path)
-        
+
         # D. 判斷是否成功
         if file_data and len(file_data) > 0:
             # 成功：加入總表
@@ -262,20 +404,64 @@ def main():
             fail_count += 1
             print(f"\n❌ 無法提取資料 (保留在原目錄): {filename}")
 
+    # C. 迴圈處理
+    # 中途出錯 (或 Ctrl+C) 時也要關閉 OCR pool，不留下 worker process
+    try:
+        for file_path in pdf_files:
+            filename = os.path.basename(file_path)
+            print(f"   正在處理: {filename} ...", end="\r")
+        
+            # 執行解析
+            textless_pages = []
+            cache_stats = {}
+            file_data = parse_single_pdf(file_path, textless_pages=textless_pages,
+                                         use_cache=True, cache_stats=cache_stats)
+
+            # 有頁面沒有文字層：送進 OCR pool，先繼續處理其他檔案
+            if textless_pages and ocr.is_available():
+                print(f"\n🔎 {filename} 有 {len(textless_pages)} 頁無文字層，已排入 OCR ...")
+                ocr_jobs.append((file_path, ocr.submit_pages(file_path, textless_pages)))
+                continue
+            if textless_pages:
+                print(f"\n⚠️ {filename} 有頁面無文字層，但找不到 Tesseract ({ocr.OCR_TESSERACT_CMD})，略過 OCR。")
+
+            report_incremental_changes(filename, file_data, cache_stats)
+            finish_file(file_path, file_data)
+
+        # C-2. 收回 OCR 結果並重新解析
+        for file_path, future in ocr_jobs:
+            try:
+                ocr_words = future.result()
+            except Exception as e:
+                print(f"\n⚠️ OCR 執行失敗: {os.path.basename(file_path)} - {e}")
+                ocr_words = {}
+            cache_stats = {}
+            file_data = parse_single_pdf(file_path, ocr_words=ocr_words, use_cache=True, cache_stats=cache_stats)
+            report_incremental_changes(os.path.basename(file_path), file_data, cache_stats)
+            finish_file(file_path, file_data)
+    finally:
+        ocr.shutdown_pool()
+
     print(f"\n\n📊 批次處理完成報告:")
     print(f"   ✅ 成功移至 {PROCESSED_DIR}: {success_count} 檔")
     print(f"   ❌ 解析失敗/無資料 (保留在 {INPUT_DIR}): {fail_count} 檔")
 
     # E. 輸出 CSV
     if all_batch_data:
-        df = pd.DataFrame(all_batch_data)
-        
         # 整理欄位
         cols = ['報單號碼', '項次', '貨號/條碼', '貨物名稱', '稅則號列', '許可證號碼', '生產國別', '申報注意事項', '原始檔名']
-        df = df[cols]
-        
-        df.to_csv(OUTPUT_CSV, index=False, encoding='utf-8-sig')
+
+        with open(OUTPUT_CSV, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=cols, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(all_batch_data)
         print(f"💾 彙整資料已儲存至: {OUTPUT_CSV}")
+
+        # F. 格式 / 批次內一致性檢查 (歷史比對於 import_tool 匯入前執行)
+        issues, _ = validator.validate_rows(all_batch_data)
+        validator.print_summary(issues, len(all_batch_data))
+        if issues:
+            validator.write_issue_report(issues, validator.report_path_for(OUTPUT_CSV))
     else:
         print("⚠️ 本次執行沒有產生任何有效資料。")
 
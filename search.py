@@ -0,0 +1,122 @@
+import description
+
+# ==========================================
+# 查詢邏輯 (GUI 主頁與 lookup_service 共用)
+# ==========================================
+
+_SELECT_COLUMNS = """
+        d.decl_no,
+        d.import_date,
+        p.barcode,
+        {name} AS name_en,
+        i.applied_ccc_code,
+        i.applied_permit_no,
+        p.risk_note
+"""
+_FROM_SQL = """
+    FROM declaration_items i
+    JOIN products p ON i.product_id = p.product_id
+    JOIN declarations d ON i.declaration_id = d.declaration_id
+    {join}
+"""
+
+# 單一條碼最近 N 筆申報 (lookup_barcodes 以 UNION ALL 組合多個條碼)
+_HISTORY_SQL = """
+    SELECT * FROM (
+        SELECT i.item_id, {columns} {source}
+        WHERE p.barcode = %s
+        ORDER BY d.import_date DESC, i.item_id DESC
+        LIMIT %s
+    ) AS h{n}
+"""
+
+
+def _select_parts(cursor):
+    """ (SELECT 欄位, FROM 子句)：已 --migrate 時品名由 product_descriptions 取回 """
+    name, join = description.name_columns(cursor)
+    return _SELECT_COLUMNS.format(name=name), _FROM_SQL.format(join=join)
+
+
+def search_items(cursor, keyword="", init=False):
+    """ 主頁查詢：init 時顯示最新 50 筆，否則以條碼 / 品名 / 稅則 / 報單號碼模糊搜尋 (最多 100 筆) """
+    columns, source = _select_parts(cursor)
+    base_sql = f"SELECT{columns}{source}"
+    if init:
+        # 初始顯示最新進口的 50 筆
+        sql = base_sql + " ORDER BY d.import_date DESC, i.item_id ASC LIMIT 50"
+        cursor.execute(sql)
+    else:
+        param = f"%{keyword}%"
+        if description.has_description_schema(cursor):
+            # 品名只比對不重複的品名表 (FULLTEXT 索引，子查詢結果先物化)，不再逐筆掃描長字串；
+            # 轉換中斷而尚未登錄 (description_id 為 NULL) 的產品仍比對 p.name_en
+            name_cond, name_param = description.name_search_condition(keyword)
+            sql = base_sql + f"""
+                WHERE p.barcode LIKE %s
+                   OR p.description_id IN (
+                        SELECT description_id FROM product_descriptions WHERE {name_cond}
+                   )
+                   OR (p.description_id IS NULL AND p.name_en LIKE %s)
+                   OR i.applied_ccc_code LIKE %s
+                   OR d.decl_no LIKE %s
+                ORDER BY d.import_date DESC LIMIT 100
+            """
+            cursor.execute(sql, (param, name_param, param, param, param))
+        else:
+            sql = base_sql + """
+                WHERE p.barcode LIKE %s
+                   OR p.name_en LIKE %s
+                   OR i.applied_ccc_code LIKE %s
+                   OR d.decl_no LIKE %s
+                ORDER BY d.import_date DESC LIMIT 100
+            """
+            cursor.execute(sql, (param,) * 4)
+    return cursor.fetchall()
+
+
+def _lookup_result(barcode, rows, history_limit):
+    if not rows:
+        return {'barcode': barcode, 'found': False}
+    latest = rows[0]
+    return {
+        'barcode': barcode,
+        'found': True,
+        'name': latest['name_en'],
+        'ccc': latest['applied_ccc_code'],
+        'permit': latest['applied_permit_no'] or "",
+        'sop': latest['risk_note'] or "",
+        'decl_no': latest['decl_no'],
+        'history': [
+            {'decl_no': r['decl_no'], 'ccc': r['applied_ccc_code'], 'permit': r['applied_permit_no'] or ""}
+            for r in rows[:history_limit]
+        ],
+    }
+
+
+def lookup_barcodes(cursor, barcodes, history_limit=5):
+    """
+    條碼精確查詢 (走 products.barcode 索引)，一次查多個條碼只需一個往返。
+    回傳 {條碼: 結果}；結果以最近一次申報為準，並附最近 history_limit 筆歷史。
+    每個條碼各自 LIMIT 後再以 UNION ALL 合併：申報歷史很長的條碼也只讀回最近幾筆。
+    (不用 ROW_NUMBER() 視窗函式，MySQL 5.7 也能執行)
+    """
+    barcodes = list(dict.fromkeys(b for b in barcodes if b))
+    if not barcodes:
+        return {}
+    limit = max(1, history_limit)
+    columns, source = _select_parts(cursor)
+    sql = " UNION ALL ".join(
+        _HISTORY_SQL.format(columns=columns, source=source, n=n) for n in range(len(barcodes))
+    )
+    params = []
+    for b in barcodes:
+        params.extend((b, limit))
+    cursor.execute(sql, params)
+
+    grouped = {b: [] for b in barcodes}
+    for r in cursor.fetchall():
+        grouped.setdefault(r['barcode'], []).append(r)
+    for rows in grouped.values():
+        # UNION ALL 不保證順序，依最近申報重新排序 (每個條碼最多 limit 筆)
+        rows.sort(key=lambda r: (r['import_date'] is not None, r['import_date'] or "", r['item_id']), reverse=True)
+    return {b: _lookup_result(b, rows, history_limit) for b, rows in grouped.items()}
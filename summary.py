@@ -0,0 +1,250 @@
+import sys
+
+# ==========================================
+# 歷史報單統計 (預先彙總表)
+# ==========================================
+# 儀表板只查詢以下彙總表，不再即時 JOIN declaration_items：
+#   summary_decl_buckets : 每張報單在 (月份, 稅則前4碼, 生產國別) 的項次數 —— 增量維護的依據
+#   summary_item_counts  : 全部報單加總後的 (月份, 稅則前4碼, 生產國別) 項次數
+#   summary_declarations : 每張報單的項次數
+# import_tool 每次匯入後，只重算「這次有動到的報單」：
+#   先從 summary_item_counts 扣掉這些報單舊的 bucket，再依最新明細重建後加回去。
+# 生產國別取自 products.origin_country (以產品主檔目前的值為準，與 --rebuild 一致)：
+#   匯入改變了某產品的生產國別時，所有用到該產品的報單都要一併重算 (見 declarations_using_products)。
+
+SUMMARY_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS summary_decl_buckets (
+        declaration_id INT NOT NULL,
+        import_month CHAR(7) NOT NULL DEFAULT '',
+        ccc_prefix CHAR(4) NOT NULL DEFAULT '',
+        origin_country VARCHAR(64) NOT NULL DEFAULT '',
+        item_count INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (declaration_id, import_month, ccc_prefix, origin_country)
+    ) DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS summary_item_counts (
+        import_month CHAR(7) NOT NULL DEFAULT '',
+        ccc_prefix CHAR(4) NOT NULL DEFAULT '',
+        origin_country VARCHAR(64) NOT NULL DEFAULT '',
+        item_count BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (import_month, ccc_prefix, origin_country),
+        KEY idx_summary_ccc (ccc_prefix),
+        KEY idx_summary_country (origin_country)
+    ) DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS summary_declarations (
+        declaration_id INT NOT NULL PRIMARY KEY,
+        decl_no VARCHAR(64) NOT NULL,
+        import_month CHAR(7) NOT NULL DEFAULT '',
+        item_count INT NOT NULL DEFAULT 0,
+        last_imported_at DATETIME NOT NULL,
+        KEY idx_summary_decl_month (import_month),
+        KEY idx_summary_decl_imported (last_imported_at)
+    ) DEFAULT CHARSET=utf8mb4
+    """,
+]
+
+# 注意：有傳參數時 pymysql 會做 % 格式化，DATE_FORMAT 的 % 需寫成 %%
+_MONTH_EXPR = "COALESCE(DATE_FORMAT(d.import_date, '%%Y-%%m'), '')"
+_CCC_PREFIX_EXPR = "LEFT(REPLACE(COALESCE(i.applied_ccc_code, ''), '.', ''), 4)"
+
+_tables_ready = False
+
+
+def ensure_summary_tables(cursor):
+    """ 建立彙總表 (同一個 process 只執行一次；DDL 會隱含 commit，請在寫入資料前呼叫) """
+    global _tables_ready
+    if _tables_ready:
+        return
+    for ddl in SUMMARY_DDL:
+        cursor.execute(ddl)
+    _tables_ready = True
+
+
+def _in_clause(values):
+    return ", ".join(["%s"] * len(values))
+
+
+def refresh_declarations(cursor, declaration_ids):
+    """
+    重算指定報單的彙總資料 (與匯入在同一個 transaction 內，由呼叫端 commit)。
+    花費只與這些報單的明細數有關，與歷史資料總量無關。
+    """
+    ids = sorted(set(declaration_ids))
+    if not ids:
+        return
+    in_ids = _in_clause(ids)
+
+    # 1. 扣除舊的貢獻
+    cursor.execute(f"""
+        UPDATE summary_item_counts s
+        JOIN (
+            SELECT import_month, ccc_prefix, origin_country, SUM(item_count) AS n
+            FROM summary_decl_buckets
+            WHERE declaration_id IN ({in_ids})
+            GROUP BY import_month, ccc_prefix, origin_country
+        ) b ON s.import_month = b.import_month
+           AND s.ccc_prefix = b.ccc_prefix
+           AND s.origin_country = b.origin_country
+        SET s.item_count = s.item_count - b.n
+    """, ids)
+    # 只清理這些報單原本貢獻的 bucket (以主鍵比對，不掃整張表)
+    cursor.execute(f"""
+        DELETE FROM summary_item_counts
+        WHERE item_count <= 0
+          AND (import_month, ccc_prefix, origin_country) IN (
+              SELECT import_month, ccc_prefix, origin_country
+              FROM summary_decl_buckets
+              WHERE declaration_id IN ({in_ids})
+          )
+    """, ids)
+    cursor.execute(f"DELETE FROM summary_decl_buckets WHERE declaration_id IN ({in_ids})", ids)
+
+    # 2. 依最新明細重建這些報單的 bucket
+    cursor.execute(f"""
+        INSERT INTO summary_decl_buckets
+            (declaration_id, import_month, ccc_prefix, origin_country, item_count)
+        SELECT i.declaration_id, {_MONTH_EXPR}, {_CCC_PREFIX_EXPR},
+               COALESCE(p.origin_country, ''), COUNT(*)
+        FROM declaration_items i
+        JOIN declarations d ON i.declaration_id = d.declaration_id
+        JOIN products p ON i.product_id = p.product_id
+        WHERE i.declaration_id IN ({in_ids})
+        GROUP BY i.declaration_id, {_MONTH_EXPR}, {_CCC_PREFIX_EXPR}, COALESCE(p.origin_country, '')
+    """, ids)
+
+    # 3. 加回總表
+    cursor.execute(f"""
+        INSERT INTO summary_item_counts (import_month, ccc_prefix, origin_country, item_count)
+        SELECT import_month, ccc_prefix, origin_country, SUM(item_count)
+        FROM summary_decl_buckets
+        WHERE declaration_id IN ({in_ids})
+        GROUP BY import_month, ccc_prefix, origin_country
+        ON DUPLICATE KEY UPDATE item_count = summary_item_counts.item_count + VALUES(item_count)
+    """, ids)
+
+    # 4. 報單層級統計
+    cursor.execute(f"""
+        INSERT INTO summary_declarations
+            (declaration_id, decl_no, import_month, item_count, last_imported_at)
+        SELECT d.declaration_id, d.decl_no, {_MONTH_EXPR}, COUNT(i.item_id), NOW()
+        FROM declarations d
+        LEFT JOIN declaration_items i ON i.declaration_id = d.declaration_id
+        WHERE d.declaration_id IN ({in_ids})
+        GROUP BY d.declaration_id, d.decl_no, d.import_date
+        ON DUPLICATE KEY UPDATE
+            decl_no = VALUES(decl_no),
+            import_month = VALUES(import_month),
+            item_count = VALUES(item_count),
+            last_imported_at = VALUES(last_imported_at)
+    """, ids)
+
+
+def declarations_using_products(cursor, product_ids, batch_size=1000):
+    """ 用到這些產品的所有報單 (產品生產國別變更後，這些報單的 bucket 都需重算) """
+    ids = sorted(set(product_ids))
+    found = set()
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        cursor.execute(f"""
+            SELECT DISTINCT declaration_id FROM declaration_items
+            WHERE product_id IN ({_in_clause(chunk)})
+        """, chunk)
+        found.update(r['declaration_id'] for r in cursor.fetchall())
+    return found
+
+
+def rebuild_summaries(cursor, batch_size=500):
+    """ 全部重建 (第一次啟用或資料修正後使用) """
+    ensure_summary_tables(cursor)
+    cursor.execute("DELETE FROM summary_item_counts")
+    cursor.execute("DELETE FROM summary_decl_buckets")
+    cursor.execute("DELETE FROM summary_declarations")
+
+    cursor.execute("SELECT declaration_id FROM declarations ORDER BY declaration_id")
+    all_ids = [r['declaration_id'] for r in cursor.fetchall()]
+    for start in range(0, len(all_ids), batch_size):
+        refresh_declarations(cursor, all_ids[start:start + batch_size])
+    return len(all_ids)
+
+# ==========================================
+# 儀表板查詢 (只讀彙總表)
+# ==========================================
+
+def fetch_months(cursor):
+    cursor.execute("SELECT DISTINCT import_month FROM summary_item_counts ORDER BY import_month DESC")
+    return [r['import_month'] for r in cursor.fetchall()]
+
+
+def fetch_dashboard(cursor, month=None, top_n=20):
+    """ 回傳儀表板所需的各項統計；month 為 'YYYY-MM' 時只看該月份 """
+    where = "WHERE import_month = %s" if month is not None else ""
+    params = (month,) if month is not None else ()
+
+    cursor.execute(f"SELECT COALESCE(SUM(item_count), 0) AS total FROM summary_item_counts {where}", params)
+    total_items = int(cursor.fetchone()['total'])
+
+    cursor.execute(f"""
+        SELECT import_month, SUM(item_count) AS item_count
+        FROM summary_item_counts {where}
+        GROUP BY import_month ORDER BY import_month DESC
+    """, params)
+    by_month = cursor.fetchall()
+
+    cursor.execute(f"""
+        SELECT ccc_prefix, SUM(item_count) AS item_count
+        FROM summary_item_counts {where}
+        GROUP BY ccc_prefix ORDER BY item_count DESC LIMIT %s
+    """, params + (top_n,))
+    by_ccc = cursor.fetchall()
+
+    cursor.execute(f"""
+        SELECT origin_country, SUM(item_count) AS item_count
+        FROM summary_item_counts {where}
+        GROUP BY origin_country ORDER BY item_count DESC LIMIT %s
+    """, params + (top_n,))
+    by_country = cursor.fetchall()
+
+    cursor.execute(f"""
+        SELECT decl_no, import_month, item_count, last_imported_at
+        FROM summary_declarations {where}
+        ORDER BY last_imported_at DESC LIMIT 100
+    """, params)
+    declarations = cursor.fetchall()
+
+    cursor.execute(f"SELECT COUNT(*) AS n FROM summary_declarations {where}", params)
+    total_decls = int(cursor.fetchone()['n'])
+
+    return {
+        'total_items': total_items,
+        'total_decls': total_decls,
+        'by_month': by_month,
+        'by_ccc': by_ccc,
+        'by_country': by_country,
+        'declarations': declarations,
+    }
+
+
+if __name__ == "__main__":
+    from database import create_connection, close_connection
+
+    if "--rebuild" not in sys.argv:
+        print("用法: python summary.py --rebuild   (重建全部歷史統計)")
+        sys.exit(0)
+
+    conn = create_connection()
+    if not conn:
+        sys.exit(1)
+    try:
+        with conn.cursor() as cursor:
+            count = rebuild_summaries(cursor)
+        conn.commit()
+        print(f"✅ 已重建 {count} 張報單的統計資料")
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ 重建失敗: {e}")
+    finally:
+        close_connection(conn)
@@ -0,0 +1,260 @@
+import re
+import os
+import sys
+import csv
+
+# ==========================================
+# 跨報單一致性 / 格式檢查
+# ==========================================
+# 在 parse_single_pdf 之後、匯入資料庫之前執行：
+#   1. 格式檢查 (不需資料庫)：報單號碼、項次、條碼、稅則、許可證格式
+#      例如 All_Import_Declarations.csv 中「項次與條碼對調、報單號碼 Unknown」的列
+#   2. 歷史比對：由歷次報單明細建立 barcode -> (申報過的稅則, 許可證, 產地) 的雜湊索引，
+#      每個項次 O(1) 查表，找出同一條碼申報不同稅則 / 許可證 / 產地，或歷史上已有多個稅則的情況
+#   3. 批次內比對：同一批資料中同一條碼出現不同稅則 / 許可證
+# 整份報單 (或整個來源檔) 都有的同一種錯誤 (例如報單號碼 Unknown) 在報告中合併成一項，
+# 不逐列重複；錯誤列照樣標記 (--skip-invalid 時略過)。
+
+LEVEL_ERROR = "error"      # 格式錯誤：匯入時預設略過
+LEVEL_WARNING = "warning"  # 與歷史 / 批次內不一致：照常匯入但需人工確認
+
+DECL_NO_RE = re.compile(r"^[A-Z]{2}/\d{2}/\d{3}/[A-Z0-9]{4,6}$")
+ITEM_NO_RE = re.compile(r"^\d{1,4}$")
+BARCODE_RE = re.compile(r"^\d{13}$")
+SCI_NOTATION_RE = re.compile(r"^\d(\.\d+)?E\+\d+$", re.IGNORECASE)
+CCC_RE = re.compile(r"^\d{4}\.\d{2}\.\d{2}\.\d{2}(-\d)?$")
+PERMIT_RE = re.compile(r"^(CI\d{12}|IFB[A-Z0-9]{11})$")
+
+ISSUE_COLUMNS = ['列號', '報單號碼', '項次', '貨號/條碼', '等級', '代碼', '說明']
+
+# 同一報單 / 來源檔中重複出現達此列數的問題，報告只列一次 (附列數與範圍)
+GROUPED_CODES = ("DECL_NO", "ITEM_IS_BARCODE", "BARCODE_MISSING", "BARCODE_SCI", "CCC_PLACEHOLDER")
+GROUP_MIN_ROWS = 3
+
+
+def _ean13_ok(barcode):
+    digits = [int(c) for c in barcode]
+    check = (10 - sum(d * (3 if i % 2 else 1) for i, d in enumerate(digits[:12])) % 10) % 10
+    return check == digits[12]
+
+
+def _ccc_digits(ccc):
+    return ccc.replace(".", "").replace("-", "")
+
+
+def _field(row, key):
+    # parser 輸出的項次為 int，CSV 讀入則為字串
+    value = row.get(key)
+    return "" if value is None else str(value).strip()
+
+
+def _issue(row_no, decl_no, item_no, barcode, level, code, message):
+    return {
+        '列號': row_no, '報單號碼': decl_no, '項次': item_no, '貨號/條碼': barcode,
+        '等級': level, '代碼': code, '說明': message,
+    }
+
+# ==========================================
+# 歷史索引
+# ==========================================
+
+def _shared_tuple(pool, values):
+    key = tuple(sorted(values))
+    return pool.setdefault(key, key)
+
+
+HISTORY_SQL = """
+    SELECT p.barcode, i.applied_ccc_code, i.applied_permit_no, p.origin_country
+    FROM declaration_items i
+    JOIN products p ON i.product_id = p.product_id
+    UNION
+    SELECT barcode, default_ccc_code, default_permit_code, origin_country FROM products
+"""
+
+
+def build_history_index(conn):
+    """
+    由歷次報單明細 (加上 products 主檔的最近申報值) 建立
+    barcode -> (申報過的稅則 tuple, 許可證 tuple, 產地) 索引。
+    以 server-side cursor 串流讀取 (UNION 已先去除重複組合)；字串與 tuple 都 intern，
+    稅則 / 許可證組合種類很少，百萬筆條碼也只佔少量記憶體。
+    """
+    import pymysql
+
+    index = {}
+    intern = sys.intern
+    shared = {}  # tuple 去重 (與 sys.intern 同樣的用途)
+    cursor = conn.cursor(pymysql.cursors.SSCursor)
+    try:
+        cursor.execute(HISTORY_SQL)
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                break
+            for barcode, ccc, permit, origin in rows:
+                if not barcode:
+                    continue
+                ccc = intern(ccc or "")
+                permit = intern(permit or "")
+                cccs, permits, h_origin = index.get(barcode, ((), (), intern(origin or "")))
+                if ccc and ccc not in cccs:
+                    cccs = _shared_tuple(shared, cccs + (ccc,))
+                if permit not in permits:
+                    permits = _shared_tuple(shared, permits + (permit,))
+                index[barcode] = (cccs, permits, h_origin)
+    finally:
+        cursor.close()
+    return index
+
+# ==========================================
+# 檢查
+# ==========================================
+
+def check_row_format(row_no, row):
+    """ 單列格式檢查 (不需資料庫) """
+    issues = []
+    decl_no = _field(row, '報單號碼')
+    item_no = _field(row, '項次')
+    barcode = _field(row, '貨號/條碼')
+    ccc = _field(row, '稅則號列')
+    permit = _field(row, '許可證號碼')
+
+    def add(level, code, message):
+        issues.append(_issue(row_no, decl_no, item_no, barcode, level, code, message))
+
+    if not DECL_NO_RE.match(decl_no):
+        add(LEVEL_ERROR, "DECL_NO", f"報單號碼格式錯誤: '{decl_no}'")
+
+    if BARCODE_RE.match(item_no):
+        add(LEVEL_ERROR, "ITEM_IS_BARCODE", f"項次欄位為條碼 (疑似欄位對調): '{item_no}'")
+    elif not ITEM_NO_RE.match(item_no):
+        add(LEVEL_ERROR, "ITEM_NO", f"項次格式錯誤: '{item_no}'")
+
+    if not barcode:
+        add(LEVEL_ERROR, "BARCODE_MISSING", "缺少條碼")
+    elif SCI_NOTATION_RE.match(barcode):
+        add(LEVEL_ERROR, "BARCODE_SCI", f"條碼被 Excel 轉成科學記號: '{barcode}'")
+    elif not BARCODE_RE.match(barcode):
+        add(LEVEL_ERROR, "BARCODE", f"條碼格式錯誤 (應為 13 碼): '{barcode}'")
+    elif not _ean13_ok(barcode):
+        add(LEVEL_WARNING, "BARCODE_CHECKSUM", f"條碼檢查碼不符: '{barcode}'")
+
+    if not CCC_RE.match(ccc):
+        add(LEVEL_ERROR, "CCC", f"稅則號列格式錯誤: '{ccc}'")
+    elif set(_ccc_digits(ccc)) == {"9"}:
+        add(LEVEL_WARNING, "CCC_PLACEHOLDER", f"稅則號列為佔位值: '{ccc}'")
+
+    if permit and not PERMIT_RE.match(permit):
+        add(LEVEL_WARNING, "PERMIT", f"許可證號碼格式異常: '{permit}'")
+
+    return issues
+
+
+def validate_rows(rows, history_index=None):
+    """
+    檢查一批資料列 (parse_single_pdf 的輸出或 CSV DictReader 的列)。
+    history_index 為 None 時只做格式與批次內檢查。
+    回傳 (issues, error_rows)：error_rows 為含格式錯誤的列號集合 (從 1 起算)。
+    """
+    issues = []
+    error_rows = set()
+    batch_seen = {}  # barcode -> (稅則, 許可證, 第一次出現的列號)
+
+    for row_no, row in enumerate(rows, start=1):
+        row_issues = check_row_format(row_no, row)
+        issues.extend(row_issues)
+        if any(i['等級'] == LEVEL_ERROR for i in row_issues):
+            error_rows.add(row_no)
+            continue
+
+        decl_no = _field(row, '報單號碼')
+        item_no = _field(row, '項次')
+        barcode = _field(row, '貨號/條碼')
+        ccc = _field(row, '稅則號列')
+        permit = _field(row, '許可證號碼')
+        origin = _field(row, '生產國別')
+
+        # 批次內一致性
+        seen = batch_seen.get(barcode)
+        if seen is None:
+            batch_seen[barcode] = (ccc, permit, row_no)
+        else:
+            if seen[0] != ccc:
+                issues.append(_issue(row_no, decl_no, item_no, barcode, LEVEL_WARNING, "BATCH_CCC",
+                                     f"同批第 {seen[2]} 列申報稅則 {seen[0]}，本列為 {ccc}"))
+            if seen[1] != permit:
+                issues.append(_issue(row_no, decl_no, item_no, barcode, LEVEL_WARNING, "BATCH_PERMIT",
+                                     f"同批第 {seen[2]} 列許可證 '{seen[1]}'，本列為 '{permit}'"))
+
+        # 歷史一致性 (O(1) 查表)
+        if history_index is None:
+            continue
+        hist = history_index.get(barcode)
+        if hist is None:
+            continue
+        h_cccs, h_permits, h_origin = hist
+        if h_cccs and ccc not in h_cccs:
+            issues.append(_issue(row_no, decl_no, item_no, barcode, LEVEL_WARNING, "HIST_CCC",
+                                 f"歷史申報稅則 {' / '.join(h_cccs)}，本次為 {ccc}"))
+        elif len(h_cccs) > 1:
+            issues.append(_issue(row_no, decl_no, item_no, barcode, LEVEL_WARNING, "HIST_CCC_MULTI",
+                                 f"歷史已以多個稅則申報: {' / '.join(h_cccs)}"))
+        if h_permits and permit not in h_permits:
+            shown = " / ".join(f"'{p}'" for p in h_permits)
+            issues.append(_issue(row_no, decl_no, item_no, barcode, LEVEL_WARNING, "HIST_PERMIT",
+                                 f"歷史許可證 {shown}，本次為 '{permit}'"))
+        if h_origin and origin and h_origin != origin:
+            issues.append(_issue(row_no, decl_no, item_no, barcode, LEVEL_WARNING, "HIST_ORIGIN",
+                                 f"歷史產地 {h_origin}，本次為 {origin}"))
+
+    return _group_repeated(issues, rows), error_rows
+
+
+def _group_repeated(issues, rows):
+    """
+    同一報單 (報單號碼 + 來源檔) 中同一代碼的問題達 GROUP_MIN_ROWS 列時合併成一項，
+    放在第一次出現的位置，說明附上列數與列號範圍。
+    """
+    groups = {}
+    for i in issues:
+        if i['代碼'] in GROUPED_CODES:
+            source = _field(rows[i['列號'] - 1], '原始檔名')
+            groups.setdefault((i['代碼'], i['報單號碼'], source), []).append(i)
+
+    merged = {}  # id(第一項) -> 合併後的 issue；其餘項目略過
+    skipped = set()
+    for group in groups.values():
+        if len(group) < GROUP_MIN_ROWS:
+            continue
+        first, last = group[0], group[-1]
+        merged[id(first)] = dict(
+            first, **{'項次': "", '貨號/條碼': "",
+                      '說明': f"{first['說明']} 等 {len(group)} 列 (第 {first['列號']}~{last['列號']} 列)"})
+        skipped.update(id(i) for i in group[1:])
+
+    return [merged.get(id(i), i) for i in issues if id(i) not in skipped]
+
+
+def print_summary(issues, total_rows):
+    errors = sum(1 for i in issues if i['等級'] == LEVEL_ERROR)
+    warnings = len(issues) - errors
+    print("-" * 30)
+    print(f"🔍 資料檢查: {total_rows} 列，❌ 格式錯誤 {errors} 項，⚠️ 不一致 {warnings} 項")
+    for i in issues[:20]:
+        mark = "❌" if i['等級'] == LEVEL_ERROR else "⚠️"
+        print(f"   {mark} 第 {i['列號']} 列 [{i['代碼']}] {i['報單號碼']} #{i['項次']} {i['貨號/條碼']}: {i['說明']}")
+    if len(issues) > 20:
+        print(f"   ... 其餘 {len(issues) - 20} 項請見檢查報告")
+
+
+def write_issue_report(issues, path):
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=ISSUE_COLUMNS)
+        writer.writeheader()
+        writer.writerows(issues)
+    print(f"📝 檢查報告已儲存至: {path}")
+
+
+def report_path_for(csv_filename):
+    base, _ = os.path.splitext(csv_filename)
+    return f"{base}_檢查報告.csv"
@@ -1,5 +1,6 @@
+import argparse
 import pdfplumber
-import pandas as pd
+import layout
 
 # 設定 PDF 檔案路徑
 file_path = "./inpdf/G2099 放行報單.pdf"  # 請確認檔名正確
@@ -39,5 +40,54 @@ def inspect_pdf_coordinates(path):
     except Exception as e:
         print(f"錯誤: {e}")
 
+def calibrate_pdf_layout(path, name=None, save=False):
+    """ 自動校正：由第一頁表頭位置推算欄位邊界，取代手動目測調整 COORD_* 常數 """
+    print(f"📐 正在校正版面: {path}")
+
+    try:
+        with pdfplumber.open(path) as pdf:
+            page = pdf.pages[0]
+            profile, positions = layout.calibrate_page(page)
+            fingerprint = layout.page_fingerprint(page.width, page.height, positions)
+    except Exception as e:
+        print(f"錯誤: {e}")
+        return None
+
+    if profile is None:
+        print("❌ 第一頁找不到任何表頭關鍵字，無法校正 (可能為掃描檔)。")
+        return None
+
+    print(f"🔑 版面指紋: {fingerprint}")
+    print("-" * 60)
+    for kw, x0 in positions.items():
+        print(f"   表頭 {kw:<12} x0 = {x0:.2f}")
+    print("-" * 60)
+
+    profiles = layout.load_profiles()
+    for field in layout.LayoutProfile.BOUNDARY_FIELDS:
+        ref = getattr(layout.DEFAULT_PROFILE, field)
+        print(f"   {field:<12} = {getattr(profile, field):>7.1f}   (V12: {ref:g})")
+
+    nearest = min(profiles.values(), key=profile.distance)
+    print(f"➡️ 最接近的設定檔: {nearest.name} (差距 {profile.distance(nearest):.1f} pt)")
+
+    if save:
+        profile.name = name or f"auto-{fingerprint[:8]}"
+        layout.save_profile(profile)
+        layout.remember_fingerprint(fingerprint, profile.name)
+        print(f"💾 已儲存設定檔 '{profile.name}' 至 {layout.LAYOUT_PROFILE_FILE}")
+
+    return profile
+
 if __name__ == "__main__":
-    inspect_pdf_coordinates(file_path)
\ No newline at end of file
+    ap = argparse.ArgumentParser(description="PDF 座標檢視 / 版面自動校正工具")
+    ap.add_argument("pdf", nargs="?", default=file_path, help="要分析的 PDF 檔案")
+    ap.add_argument("--calibrate", action="store_true", help="由表頭位置自動推算欄位邊界")
+    ap.add_argument("--save", action="store_true", help="校正結果存成版面設定檔並寫入快取")
+    ap.add_argument("--name", help="儲存時的設定檔名稱 (預設 auto-<指紋>)")
+    args = ap.parse_args()
+
+    if args.calibrate:
+        calibrate_pdf_layout(args.pdf, name=args.name, save=args.save)
+    else:
+        inspect_pdf_coordinates(args.pdf)
\ No newline at end of file